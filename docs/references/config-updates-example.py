@@ -0,0 +1,243 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that reports live progress through debounced config updates."""
+import copy
+import time
+from typing import Any, Dict, List
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pyarrow as pa
+
+
+def to_json_compatible(value: Any) -> Any:
+    """
+    Convert numpy and Arrow values to plain Python values in bulk.
+
+    Arrays are converted with a single ``tolist``/``to_pylist`` call instead of one
+    conversion per element, and byte strings are decoded as UTF-8.
+    """
+    if isinstance(value, dict):
+        return {str(key): to_json_compatible(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_compatible(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "SO":
+            return to_json_compatible(value.tolist())
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return to_json_compatible(value.item())
+    if isinstance(value, pa.Table):
+        return value.to_pydict()
+    if isinstance(value, (pa.Array, pa.ChunkedArray)):
+        return value.to_pylist()
+    if isinstance(value, pa.Scalar):
+        return value.as_py()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def _parse_pointer(path: str) -> List[str]:
+    """Split a JSON pointer such as ``/Configuration/history`` into keys."""
+    if not path.startswith("/"):
+        raise ValueError(f"Config paths must start with '/': {path}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _lookup(document: Dict[str, Any], keys: List[str]) -> Any:
+    for key in keys:
+        if not isinstance(document, dict) or key not in document:
+            return KeyError
+        document = document[key]
+    return document
+
+
+def _assign(document: Dict[str, Any], keys: List[str], value: Any) -> None:
+    for key in keys[:-1]:
+        document = document.setdefault(key, {})
+    if value is KeyError:
+        document.pop(keys[-1], None)
+    else:
+        document[keys[-1]] = value
+
+
+class ConfigUpdater:
+    """
+    Batch and debounce changes to ``provider.full_config``.
+
+    Changes are recorded as JSON-patch style operations against a working copy of the
+    configuration. ``flush`` calls ``save_full_config`` only if the operations actually
+    change the last saved configuration, and at most once per ``debounce_seconds``
+    unless forced.
+
+    Parameters
+    ----------
+    provider
+        The plugin's provider.
+    debounce_seconds
+        Minimum time between 2 saves.
+    """
+
+    def __init__(self, provider: AMPProviderV2, debounce_seconds: float = 0.5) -> None:
+        self.provider = provider
+        self.debounce_seconds = debounce_seconds
+        self.config = copy.deepcopy(provider.full_config)
+        self.saves = 0
+        self.skipped = 0
+        self._saved = copy.deepcopy(self.config)
+        self._pending: Dict[str, None] = {}
+        self._last_save = 0.0
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Return the current value at ``path``, including unsaved changes."""
+        value = _lookup(self.config, _parse_pointer(path))
+        return default if value is KeyError else value
+
+    def set(self, path: str, value: Any) -> None:
+        """Set the value at ``path``, creating missing parent objects."""
+        _assign(self.config, _parse_pointer(path), to_json_compatible(value))
+        self._pending[path] = None
+
+    def remove(self, path: str) -> None:
+        """Remove the value at ``path`` if it exists."""
+        _assign(self.config, _parse_pointer(path), KeyError)
+        self._pending[path] = None
+
+    def apply_patch(self, operations: List[Dict[str, Any]]) -> None:
+        """Apply a list of ``add``, ``replace`` and ``remove`` operations."""
+        for operation in operations:
+            if operation["op"] in ("add", "replace"):
+                self.set(operation["path"], operation["value"])
+            elif operation["op"] == "remove":
+                self.remove(operation["path"])
+            else:
+                raise ValueError(f"Unsupported operation: {operation['op']}")
+
+    @property
+    def patch(self) -> List[Dict[str, Any]]:
+        """
+        Operations that turn the last saved configuration into the current one.
+
+        Only the paths changed since the last save are compared, using their current
+        values, so a later change to a parent path is taken into account.
+        """
+        changes = []
+        for path in self._pending:
+            keys = _parse_pointer(path)
+            current = _lookup(self.config, keys)
+            if current == _lookup(self._saved, keys):
+                continue
+            if current is KeyError:
+                changes.append({"op": "remove", "path": path})
+            else:
+                changes.append({"op": "replace", "path": path, "value": current})
+        return changes
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Save the configuration if it has changed.
+
+        Parameters
+        ----------
+        force
+            Save even if the last save was less than ``debounce_seconds`` ago. Use this
+            for the final update, for example in ``on_complete``.
+
+        Returns
+        -------
+        bool
+            Whether ``save_full_config`` was called.
+        """
+        changes = self.patch
+        if not changes:
+            self._pending.clear()
+            return False
+        if not force and time.monotonic() - self._last_save < self.debounce_seconds:
+            self.skipped += 1
+            return False
+        self.provider.save_full_config(self.config)
+        # Copy what was sent, so later changes to the working copy aren't also made to
+        # the saved one.
+        self._saved = copy.deepcopy(self.config)
+        self._pending.clear()
+        self._last_save = time.monotonic()
+        self.saves += 1
+        return True
+
+    @property
+    def pending_count(self) -> int:
+        """Number of paths changed since the last save."""
+        return len(self._pending)
+
+
+class LiveProgress(PluginV2):
+    """Pass records through and report row counts to the UI as they arrive."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "LiveProgress"
+        self.config = ConfigUpdater(provider, debounce_seconds=1.0)
+        self.rows_seen = 0
+        self.batch_sizes: List[int] = []
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Pass the batch through and record its size in the tool configuration.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        self.rows_seen += batch.num_rows
+        self.batch_sizes.append(batch.num_rows)
+        self.config.set("/Configuration/progress/rowsSeen", self.rows_seen)
+        batch_sizes = np.array(self.batch_sizes)
+        self.config.set("/Configuration/progress/batchSizes", batch_sizes)
+        self.config.flush()
+        self.provider.write_to_anchor("Output", batch)
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Send the final progress to the UI."""
+        self.config.set("/Configuration/progress/done", True)
+        self.config.flush(force=True)
+        self.provider.io.info(
+            f"{self.name} finished. Config saves: {self.config.saves}, "
+            f"debounced: {self.config.skipped}."
+        )
@@ -0,0 +1,333 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example DCM input tool that shares resolved connections and open database handles."""
+import datetime as dt
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import pyarrow as pa
+
+ConnectionCallback = Callable[[Dict[str, Any]], None]
+ErrorCallback = Callable[[Exception], None]
+
+_EXPIRY_KEYS = ("expiresOn", "expires_on")
+
+
+def _credential_expiry(value: Any) -> Optional[float]:
+    """Return the earliest secret expiry in a DCM connection, as a POSIX timestamp."""
+    earliest = None
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in _EXPIRY_KEYS and isinstance(item, str) and item:
+                try:
+                    expires = dt.datetime.fromisoformat(item.replace("Z", "+00:00"))
+                except ValueError:
+                    continue
+                if expires.tzinfo is None:
+                    expires = expires.replace(tzinfo=dt.timezone.utc)
+                found = expires.timestamp()
+            else:
+                found = _credential_expiry(item)
+            if found is not None and (earliest is None or found < earliest):
+                earliest = found
+    elif isinstance(value, list):
+        for item in value:
+            found = _credential_expiry(item)
+            if found is not None and (earliest is None or found < earliest):
+                earliest = found
+    return earliest
+
+
+class DcmConnectionCache:
+    """
+    Cache of connections resolved with ``provider.dcm.get_connection``.
+
+    The cache lives in the memory of the tool's Python process, so it only saves
+    round trips within one tool. Entries expire after ``max_age`` seconds, or
+    ``refresh_margin`` seconds before the earliest secret in the connection expires,
+    whichever comes first. Requests for a connection ID that is already being
+    resolved wait for that reply, unless it is older than ``request_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 300.0,
+        refresh_margin: float = 30.0,
+        request_timeout: float = 60.0,
+    ) -> None:
+        self.max_age = max_age
+        self.refresh_margin = refresh_margin
+        self.request_timeout = request_timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._pending: Dict[
+            str, Tuple[float, List[Tuple[ConnectionCallback, Optional[ErrorCallback]]]]
+        ] = {}
+
+    def get_connection(
+        self,
+        dcm: Any,
+        connection_id: str,
+        callback_fn: ConnectionCallback,
+        error_fn: Optional[ErrorCallback] = None,
+    ) -> None:
+        """
+        Pass the connection information for ``connection_id`` to ``callback_fn``.
+
+        Has the same signature as ``provider.dcm.get_connection`` apart from the DCM
+        provider itself. A cached connection is passed to the callback immediately.
+        If the DCM request fails, the exception is raised to the caller that sent it,
+        and passed to the ``error_fn`` of every other caller that waited for it.
+
+        Parameters
+        ----------
+        dcm
+            The DCM provider, usually ``self.provider.dcm``.
+        connection_id
+            A connection ID.
+        callback_fn
+            A callback function that receives the connection information dictionary.
+        error_fn
+            A callback function that receives the exception if a request that this
+            call waits for fails.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(connection_id)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                connection = entry[1]
+            else:
+                connection = None
+                started, waiters = self._pending.get(connection_id, (now, []))
+                waiters.append((callback_fn, error_fn))
+                if waiters[:-1] and now - started < self.request_timeout:
+                    return
+                # Nothing is pending, or DCM never replied: send a new request that
+                # answers every waiter.
+                self._pending[connection_id] = (now, waiters)
+                sender = len(waiters) - 1
+                self.misses += 1
+
+        if connection is not None:
+            callback_fn(connection)
+            return
+
+        def on_connection(resolved: Dict[str, Any]) -> None:
+            expires_at = time.time() + self.max_age
+            secret_expiry = _credential_expiry(resolved)
+            if secret_expiry is not None:
+                expires_at = min(expires_at, secret_expiry - self.refresh_margin)
+            with self._lock:
+                self._entries[connection_id] = (expires_at, resolved)
+                _, callbacks = self._pending.pop(connection_id, (now, []))
+            for callback, _ in callbacks:
+                callback(resolved)
+
+        try:
+            dcm.get_connection(connection_id, on_connection)
+        except Exception as e:
+            with self._lock:
+                _, callbacks = self._pending.pop(connection_id, (now, []))
+            for i, (_, on_error) in enumerate(callbacks):
+                if i != sender and on_error is not None:
+                    on_error(e)
+            raise
+
+    def invalidate(self, connection_id: str) -> None:
+        """Drop a cached connection, for example after its credentials are rejected."""
+        with self._lock:
+            self._entries.pop(connection_id, None)
+
+    def clear(self) -> None:
+        """Drop every cached connection."""
+        with self._lock:
+            self._entries.clear()
+
+
+_connection_cache = DcmConnectionCache()
+
+
+def get_connection_cache() -> DcmConnectionCache:
+    """Return the cache of this tool process."""
+    return _connection_cache
+
+
+class ConnectionPool:
+    """
+    Pool of open connections keyed by DCM connection ID.
+
+    Parameters
+    ----------
+    factory
+        Opens a new connection from resolved DCM connection information.
+    close
+        Closes a connection; defaults to calling its ``close`` method.
+    max_idle
+        Maximum number of idle connections kept per connection ID.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Dict[str, Any]], Any],
+        close: Optional[Callable[[Any], None]] = None,
+        max_idle: int = 4,
+    ) -> None:
+        self.factory = factory
+        self.close = close or (lambda connection: connection.close())
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[Any]] = defaultdict(list)
+
+    def borrow(self, connection_id: str, connection_info: Dict[str, Any]) -> Any:
+        """Return an idle connection for ``connection_id``, or open a new one."""
+        with self._lock:
+            idle = self._idle[connection_id]
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        return self.factory(connection_info)
+
+    def give_back(
+        self, connection_id: str, connection: Any, discard: bool = False
+    ) -> None:
+        """Return a borrowed connection; broken connections should be discarded."""
+        with self._lock:
+            idle = self._idle[connection_id]
+            if not discard and len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        self.close(connection)
+
+    @contextmanager
+    def lease(
+        self, connection_id: str, connection_info: Dict[str, Any]
+    ) -> Iterator[Any]:
+        """Borrow a connection for the duration of a ``with`` block."""
+        connection = self.borrow(connection_id, connection_info)
+        try:
+            yield connection
+        except Exception:
+            self.give_back(connection_id, connection, discard=True)
+            raise
+        self.give_back(connection_id, connection)
+
+    def close_all(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for connections in idle.values():
+            for connection in connections:
+                self.close(connection)
+
+
+class FakeDcmProvider:
+    """
+    Local stand-in for ``provider.dcm`` in unit tests.
+
+    Parameters
+    ----------
+    connections
+        Connection information to return, keyed by connection ID.
+    """
+
+    def __init__(self, connections: Dict[str, Dict[str, Any]]) -> None:
+        self.connections = connections
+        self.requests: List[str] = []
+
+    def get_connection(
+        self, connection_id: str, callback_fn: ConnectionCallback
+    ) -> None:
+        """Pass the stored connection information to ``callback_fn``."""
+        self.requests.append(connection_id)
+        if connection_id not in self.connections:
+            raise WorkflowRuntimeError(f"Unknown DCM connection: {connection_id}")
+        callback_fn(self.connections[connection_id])
+
+
+def open_sqlite_connection(connection_info: Dict[str, Any]) -> "sqlite3.Connection":
+    """
+    Open a SQLite database from resolved DCM connection information.
+
+    The keys in ``connection_info`` depend on the technology of the DCM data source.
+    This example reads the database file from the ``database`` parameter; replace it
+    with a call to your own database driver.
+    """
+    database = (connection_info.get("parameters") or {}).get("database")
+    if not database:
+        raise WorkflowRuntimeError("The DCM connection has no database parameter.")
+    # Pooled connections can be borrowed from a different thread than the one that
+    # opened them.
+    return sqlite3.connect(database, check_same_thread=False)
+
+
+_database_pool = ConnectionPool(open_sqlite_connection)
+
+
+class DcmQueryInput(PluginV2):
+    """Run a query against a DCM connection through the connection cache and pool."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "DcmQueryInput"
+        self.connection_id = self.provider.tool_config.get("dcmConnectionId") or ""
+        self.query = self.provider.tool_config.get("query") or ""
+        if not self.connection_id:
+            raise WorkflowRuntimeError("No DCM connection selected.")
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """Input tools don't have incoming connections."""
+        raise NotImplementedError("Input tools don't receive incoming connections.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """Input tools don't receive batches."""
+        raise NotImplementedError("Input tools don't receive batches.")
+
+    def on_complete(self) -> None:
+        """Resolve the DCM connection through the cache and run the query."""
+        get_connection_cache().get_connection(
+            self.provider.dcm, self.connection_id, self._run_query
+        )
+
+    def _run_query(self, connection_info: Dict[str, Any]) -> None:
+        with _database_pool.lease(self.connection_id, connection_info) as connection:
+            cursor = connection.cursor()
+            cursor.execute(self.query)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        table = pa.table(
+            {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+        )
+        self.provider.write_to_anchor("Output", table)
+        cache = get_connection_cache()
+        self.provider.io.info(
+            f"{self.name} finished. DCM cache hits: {cache.hits}, "
+            f"misses: {cache.misses}; connections opened: {_database_pool.created}, "
+            f"reused: {_database_pool.reused}."
+        )
@@ -0,0 +1,226 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that works on low-cardinality string fields as dictionary indices."""
+from typing import BinaryIO, Dict, List, Union
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import create_schema
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class StableDictionary:
+    """
+    Dictionary of string values that only grows, shared by every batch of a column.
+
+    A value keeps the same index for the lifetime of the dictionary, so indices from
+    different batches can be compared, counted, or used as array positions directly.
+
+    Parameters
+    ----------
+    value_type
+        Arrow type of the values, ``pa.string()`` for both ``v_string`` and
+        ``v_wstring`` fields.
+    max_size
+        Largest number of distinct values; ``encode`` raises ValueError beyond it.
+    """
+
+    def __init__(self, value_type: "pa.DataType" = pa.string(), max_size: int = 65536):
+        self.max_size = max_size
+        self._dictionary = pa.array([], value_type)
+        self._delta_start = 0
+
+    @property
+    def dictionary(self) -> "pa.Array":
+        """All values, in index order."""
+        return self._dictionary
+
+    @property
+    def delta(self) -> "pa.Array":
+        """Values that the last call to ``encode`` added to the dictionary."""
+        return self._dictionary[self._delta_start :]
+
+    def __len__(self) -> int:
+        return len(self._dictionary)
+
+    def encode(
+        self, values: Union["pa.Array", "pa.ChunkedArray"]
+    ) -> "pa.DictionaryArray":
+        """
+        Return ``values`` as a dictionary array that uses this dictionary.
+
+        New values are appended to the dictionary; nulls stay null.
+        """
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks()
+        if pa.types.is_dictionary(values.type):
+            values = values.cast(self._dictionary.type)
+        self._delta_start = len(self._dictionary)
+        indices = pc.index_in(values, value_set=self._dictionary)
+        missing = pc.and_(pc.is_null(indices), pc.is_valid(values))
+        if pc.any(missing).as_py():
+            added = pc.unique(values.filter(missing))
+            if len(self._dictionary) + len(added) > self.max_size:
+                raise ValueError(
+                    f"More than {self.max_size} distinct values; "
+                    "the column is not low-cardinality."
+                )
+            self._dictionary = pa.concat_arrays([self._dictionary, added])
+            indices = pc.index_in(values, value_set=self._dictionary)
+        return pa.DictionaryArray.from_arrays(indices, self._dictionary)
+
+
+def encode_columns(
+    table: "pa.Table", dictionaries: Dict[str, StableDictionary]
+) -> "pa.Table":
+    """Dictionary-encode the named columns of a table, keeping the field metadata."""
+    for name, dictionary in dictionaries.items():
+        position = table.schema.get_field_index(name)
+        field = table.schema.field(position)
+        encoded = dictionary.encode(table[name])
+        table = table.set_column(
+            position,
+            pa.field(name, encoded.type, field.nullable, field.metadata),
+            encoded,
+        )
+    return table
+
+
+def decode_columns(table: "pa.Table") -> "pa.Table":
+    """Replace every dictionary column with its plain values, keeping field metadata."""
+    for position, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            value_type = field.type.value_type
+            table = table.set_column(
+                position,
+                pa.field(field.name, value_type, field.nullable, field.metadata),
+                table.column(position).cast(value_type),
+            )
+    return table
+
+
+class DictionaryStreamWriter:
+    """
+    Write tables to an Arrow IPC stream, sending only new dictionary values.
+
+    Use it to spool encoded batches to disk or to another process. Each dictionary
+    is written in full once; later batches only carry the values that ``encode``
+    added since, as long as the columns come from the same ``StableDictionary``.
+
+    Parameters
+    ----------
+    sink
+        A path or a writable binary file.
+    schema
+        Schema of the encoded tables.
+    """
+
+    def __init__(self, sink: Union[str, BinaryIO], schema: "pa.Schema") -> None:
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        self._writer = pa.ipc.new_stream(sink, schema, options=options)
+
+    def write(self, table: "pa.Table") -> None:
+        """Write the record batches of a table."""
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """Write the end-of-stream marker."""
+        self._writer.close()
+
+
+class CategoryCounts(PluginV2):
+    """Count the records for each value of low-cardinality string fields."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "CategoryCounts"
+        fields = self.provider.tool_config.get("fields") or ""
+        self.fields: List[str] = [f.strip() for f in fields.split(",") if f.strip()]
+        if not self.fields:
+            raise WorkflowRuntimeError("Select at least one field to count.")
+        self.dictionaries = {field: StableDictionary() for field in self.fields}
+        self.counts = {field: np.zeros(0, dtype=np.int64) for field in self.fields}
+        self.output_schema = create_schema(
+            {
+                "field": {"type": FieldType.v_string},
+                "value": {"type": FieldType.v_wstring},
+                "count": {"type": FieldType.int64},
+            }
+        )
+        self.provider.push_outgoing_metadata("Output", self.output_schema)
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Encode the counted fields and add up their indices.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        missing = [field for field in self.fields if field not in batch.column_names]
+        if missing:
+            raise WorkflowRuntimeError(f"Missing fields: {', '.join(missing)}")
+        encoded = encode_columns(batch.select(self.fields), self.dictionaries)
+        for field in self.fields:
+            indices = encoded[field].combine_chunks().indices
+            indices = indices.filter(pc.is_valid(indices)).to_numpy()
+            size = len(self.dictionaries[field])
+            counts = np.bincount(indices, minlength=size)
+            counts[: len(self.counts[field])] += self.counts[field]
+            self.counts[field] = counts
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Write one record per field value."""
+        for field in self.fields:
+            values = self.dictionaries[field].dictionary
+            self.provider.write_to_anchor(
+                "Output",
+                pa.Table.from_arrays(
+                    [
+                        pa.array([field] * len(values), pa.string()),
+                        values,
+                        pa.array(self.counts[field], pa.int64()),
+                    ],
+                    schema=self.output_schema,
+                ),
+            )
+        self.provider.io.info(f"{self.name} finished.")
@@ -0,0 +1,141 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark the compiled filter plan against full-batch Arrow compute masks.
+
+Run it next to expression-filter-example.py, in an environment with the SDK:
+
+    python expression-filter-benchmark.py --rows 1000000 --batch-size 10000
+"""
+import argparse
+import importlib.util
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_spec = importlib.util.spec_from_file_location(
+    "expression_filter", Path(__file__).with_name("expression-filter-example.py")
+)
+expression_filter = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(expression_filter)  # type: ignore
+
+CITIES = ["Boston", "Denver", "Irvine", "London", "Prague", "Sydney", "Tokyo"]
+
+# Each case pairs an expression with the full-batch mask a plugin would build by hand.
+CASES: List[Tuple[str, str, Callable[["pa.Table"], "pa.Array"]]] = [
+    (
+        "selective AND",
+        "[price] < 1 AND [city] = 'Boston' AND [quantity] BETWEEN 10 AND 20",
+        lambda t: pc.and_(
+            pc.and_(pc.less(t["price"], 1), pc.equal(t["city"], "Boston")),
+            pc.and_(
+                pc.greater_equal(t["quantity"], 10), pc.less_equal(t["quantity"], 20)
+            ),
+        ),
+    ),
+    (
+        "selective IN",
+        "[city] IN ('Prague', 'Tokyo') AND [price] > 99",
+        lambda t: pc.and_(
+            pc.is_in(t["city"], value_set=pa.array(["Prague", "Tokyo"])),
+            pc.greater(t["price"], 99),
+        ),
+    ),
+    (
+        "non-selective AND",
+        "[price] >= 1 AND [quantity] > 0 AND [city] IS NOT NULL",
+        lambda t: pc.and_(
+            pc.and_(pc.greater_equal(t["price"], 1), pc.greater(t["quantity"], 0)),
+            pc.is_valid(t["city"]),
+        ),
+    ),
+    (
+        "non-selective OR",
+        "[price] >= 1 OR [city] LIKE 'B%'",
+        lambda t: pc.or_(
+            pc.greater_equal(t["price"], 1), pc.match_like(t["city"], "B%")
+        ),
+    ),
+]
+
+
+def make_batches(rows: int, batch_size: int, seed: int = 0) -> List["pa.Table"]:
+    """Return random batches with a float, an integer and a low-cardinality field."""
+    generator = np.random.default_rng(seed)
+    batches = []
+    for start in range(0, rows, batch_size):
+        size = min(batch_size, rows - start)
+        batches.append(
+            pa.table(
+                {
+                    "price": generator.uniform(0, 100, size),
+                    "quantity": generator.integers(0, 1000, size),
+                    "city": pa.array(generator.choice(CITIES, size)),
+                }
+            )
+        )
+    return batches
+
+
+def _time(function: Callable[[], None], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Run every case and print the median time per pass over all batches."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    batches = make_batches(args.rows, args.batch_size)
+    print(f"{'case':<20}{'pass rate':>10}{'mask ms':>10}{'plan ms':>10}")
+    for name, expression, build_mask in CASES:
+        plan = expression_filter.compile_filter(expression)
+        passed = sum(len(plan.select(batch)) for batch in batches)
+        for batch in batches:
+            expected = batch.filter(pc.fill_null(build_mask(batch), False))
+            if not plan.split(batch, keep_failed=False)[0].equals(expected):
+                raise SystemExit(f"{name}: the plan and the mask disagree.")
+
+        def run_mask() -> None:
+            for batch in batches:
+                batch.filter(pc.fill_null(build_mask(batch), False))
+
+        def run_plan() -> None:
+            for batch in batches:
+                plan.split(batch, keep_failed=False)
+
+        mask_time = _time(run_mask, args.repeat)
+        plan_time = _time(run_plan, args.repeat)
+        print(
+            f"{name:<20}{passed / args.rows:>10.1%}"
+            f"{mask_time * 1000:>10.1f}{plan_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example filter tool that compiles a filter expression once and reuses the plan."""
+import functools
+import re
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+      | '(?P<single>(?:[^']|'')*)'
+      | "(?P<double>(?:[^"]|"")*)"
+      | \[(?P<field>[^\]]+)\]
+      | (?P<symbol><=|>=|<>|!=|==|=|<|>|\(|\)|,)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""",
+    re.VERBOSE,
+)
+# A selection is None (every row), a boolean mask over the batch, or sorted row
+# indices. Selections below this fraction of the batch are kept as indices, and later
+# conditions only evaluate those rows; above it, evaluating the whole column and
+# combining bitmaps is cheaper than gathering the rows.
+DENSE_SELECTION = 0.25
+_INT64_RANGE = range(-(2**63), 2**63)
+_KEYWORDS = {
+    "AND", "OR", "NOT", "BETWEEN", "IN", "IS", "NULL", "LIKE", "TRUE", "FALSE"
+}
+_COMPARISONS: Dict[str, Callable] = {
+    "=": pc.equal,
+    "!=": pc.not_equal,
+    "<": pc.less,
+    "<=": pc.less_equal,
+    ">": pc.greater,
+    ">=": pc.greater_equal,
+}
+_NEGATED_COMPARISONS = {
+    "=": "!=", "!=": "=", "<": ">=", ">=": "<", ">": "<=", "<=": ">"
+}
+
+
+Selection = Union[None, "pa.BooleanArray", np.ndarray]
+
+
+class FilterSyntaxError(ValueError):
+    """Raised when a filter expression can't be parsed."""
+
+
+def _as_array(values: Union["pa.Array", "pa.ChunkedArray"]) -> "pa.Array":
+    if isinstance(values, pa.ChunkedArray):
+        return values.combine_chunks()
+    return values
+
+
+def _count(selection: Selection, num_rows: int) -> int:
+    if selection is None:
+        return num_rows
+    if isinstance(selection, np.ndarray):
+        return len(selection)
+    return pc.sum(selection).as_py() or 0
+
+
+def _compact(mask: "pa.BooleanArray", num_rows: int) -> Selection:
+    """Turn a mask into row indices when few rows are left."""
+    if _count(mask, num_rows) >= num_rows * DENSE_SELECTION:
+        return mask
+    return np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+
+
+def _as_mask(selection: Selection, num_rows: int) -> "pa.BooleanArray":
+    if selection is None:
+        return pa.array(np.ones(num_rows, dtype=bool))
+    if isinstance(selection, np.ndarray):
+        mask = np.zeros(num_rows, dtype=bool)
+        mask[selection] = True
+        return pa.array(mask)
+    return selection
+
+
+class _Node:
+    """A node of a compiled filter plan."""
+
+    fields: FrozenSet[str] = frozenset()
+
+    def select(self, table: "pa.Table", selection: Selection) -> Selection:
+        """Return the subset of ``selection`` that passes."""
+        raise NotImplementedError()
+
+    def negate(self) -> "_Node":
+        """Return the node that passes the non-null rows this one rejects."""
+        raise NotImplementedError()
+
+
+class _Predicate(_Node):
+    """A condition on a single field; rows where it is null never pass."""
+
+    def __init__(self, field: str, negated: bool = False) -> None:
+        self.field = field
+        self.negated = negated
+        self.fields = frozenset([field])
+
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        raise NotImplementedError()
+
+    def select(self, table: "pa.Table", selection: Selection) -> Selection:
+        values = table[self.field]
+        if isinstance(selection, np.ndarray):
+            mask = _as_array(pc.fill_null(self.mask(values.take(selection)), False))
+            return selection[mask.to_numpy(zero_copy_only=False).astype(bool)]
+        mask = _as_array(pc.fill_null(self.mask(values), False))
+        if selection is not None:
+            mask = pc.and_(selection, mask)
+        return _compact(mask, table.num_rows)
+
+
+class _Comparison(_Predicate):
+    def __init__(self, field: str, op: str, value: Any) -> None:
+        super().__init__(field)
+        self.op = op
+        self.value = value
+
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        return _COMPARISONS[self.op](values, self.value)
+
+    def negate(self) -> _Node:
+        return _Comparison(self.field, _NEGATED_COMPARISONS[self.op], self.value)
+
+
+class _Between(_Predicate):
+    def __init__(self, field: str, low: Any, high: Any, negated: bool = False):
+        super().__init__(field, negated)
+        self.low = low
+        self.high = high
+
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        if self.negated:
+            return pc.or_(pc.less(values, self.low), pc.greater(values, self.high))
+        return pc.and_(
+            pc.greater_equal(values, self.low), pc.less_equal(values, self.high)
+        )
+
+    def negate(self) -> _Node:
+        return _Between(self.field, self.low, self.high, not self.negated)
+
+
+class _In(_Predicate):
+    def __init__(self, field: str, values: List[Any], negated: bool = False):
+        super().__init__(field, negated)
+        self.values = values
+        self._value_sets: Dict[str, "pa.Array"] = {}
+
+    def _value_set(self, value_type: "pa.DataType") -> "pa.Array":
+        key = str(value_type)
+        if key not in self._value_sets:
+            try:
+                self._value_sets[key] = pa.array(self.values).cast(value_type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                raise ValueError(f"The IN list doesn't match the type of {self.field}.")
+        return self._value_sets[key]
+
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        found = pc.is_in(values, value_set=self._value_set(values.type))
+        if self.negated:
+            return pc.and_(pc.is_valid(values), pc.invert(found))
+        return found
+
+    def negate(self) -> _Node:
+        return _In(self.field, self.values, not self.negated)
+
+
+class _IsNull(_Predicate):
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        return pc.is_valid(values) if self.negated else pc.is_null(values)
+
+    def negate(self) -> _Node:
+        return _IsNull(self.field, not self.negated)
+
+
+class _Like(_Predicate):
+    def __init__(self, field: str, pattern: str, negated: bool = False) -> None:
+        super().__init__(field, negated)
+        self.pattern = pattern
+
+    def mask(self, values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+        found = pc.match_like(values, self.pattern)
+        return pc.invert(found) if self.negated else found
+
+    def negate(self) -> _Node:
+        return _Like(self.field, self.pattern, not self.negated)
+
+
+class _Compound(_Node):
+    """
+    AND or OR of several conditions, evaluated in an adaptive order.
+
+    Each condition's pass rate is tracked across batches, and the conditions are
+    reordered after every batch: AND runs the most selective first, and OR the
+    least selective, so that later conditions see as few rows as possible.
+    """
+
+    def __init__(self, children: List[_Node]) -> None:
+        self.children = children
+        self.fields = frozenset().union(*(child.fields for child in children))
+        self._pass_rates = [0.5] * len(children)
+
+    def _record(self, position: int, rows_in: int, rows_out: int) -> None:
+        if rows_in:
+            rate = self._pass_rates[position]
+            self._pass_rates[position] = 0.8 * rate + 0.2 * rows_out / rows_in
+
+    def _reorder(self, most_selective_first: bool) -> None:
+        order = sorted(
+            range(len(self.children)),
+            key=self._pass_rates.__getitem__,
+            reverse=not most_selective_first,
+        )
+        self.children = [self.children[i] for i in order]
+        self._pass_rates = [self._pass_rates[i] for i in order]
+
+
+class _And(_Compound):
+    def select(self, table: "pa.Table", selection: Selection) -> Selection:
+        rows = _count(selection, table.num_rows)
+        for position, child in enumerate(self.children):
+            if not rows:
+                break
+            selection = child.select(table, selection)
+            passed = _count(selection, table.num_rows)
+            self._record(position, rows, passed)
+            rows = passed
+        self._reorder(most_selective_first=True)
+        return selection
+
+    def negate(self) -> _Node:
+        return _Or([child.negate() for child in self.children])
+
+
+class _Or(_Compound):
+    def select(self, table: "pa.Table", selection: Selection) -> Selection:
+        passed: List[Selection] = []
+        rows = _count(selection, table.num_rows)
+        for position, child in enumerate(self.children):
+            if not rows:
+                break
+            hits = child.select(table, selection)
+            passed.append(hits)
+            # Later conditions only see the rows that haven't passed yet.
+            if isinstance(selection, np.ndarray) and isinstance(hits, np.ndarray):
+                selection = np.setdiff1d(selection, hits, assume_unique=True)
+            else:
+                remaining = pc.invert(_as_mask(hits, table.num_rows))
+                if selection is not None:
+                    remaining = pc.and_(selection, remaining)
+                selection = _compact(remaining, table.num_rows)
+            self._record(position, rows, rows - _count(selection, table.num_rows))
+            rows = _count(selection, table.num_rows)
+        self._reorder(most_selective_first=False)
+        if not passed:
+            return selection
+        if all(isinstance(hits, np.ndarray) for hits in passed):
+            return np.sort(np.concatenate(passed))
+        mask = _as_mask(passed[0], table.num_rows)
+        for hits in passed[1:]:
+            mask = pc.or_(mask, _as_mask(hits, table.num_rows))
+        return mask
+
+    def negate(self) -> _Node:
+        return _And([child.negate() for child in self.children])
+
+
+class _Parser:
+    """Recursive-descent parser from a filter expression to a plan tree."""
+
+    def __init__(self, expression: str) -> None:
+        self.tokens = self._tokenize(expression)
+        self.position = 0
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[Tuple[str, Any]]:
+        tokens: List[Tuple[str, Any]] = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if not match:
+                raise FilterSyntaxError(f"Unexpected text at {expression[position:]!r}")
+            position = match.end()
+            kind = match.lastgroup
+            text = match.group(kind)
+            if kind == "number":
+                if any(character in text for character in ".eE"):
+                    tokens.append(("literal", float(text)))
+                elif int(text) in _INT64_RANGE:
+                    tokens.append(("literal", int(text)))
+                else:
+                    raise FilterSyntaxError(f"{text} doesn't fit in a 64-bit integer.")
+            elif kind in ("single", "double"):
+                quote = "'" if kind == "single" else '"'
+                tokens.append(("literal", text.replace(quote * 2, quote)))
+            elif kind == "word" and text.upper() in ("TRUE", "FALSE"):
+                tokens.append(("literal", text.upper() == "TRUE"))
+            elif kind == "word" and text.upper() in _KEYWORDS:
+                tokens.append(("keyword", text.upper()))
+            elif kind == "word":
+                tokens.append(("field", text))
+            else:
+                tokens.append((kind, text))
+        return tokens
+
+    def _peek(self) -> Tuple[str, Any]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return ("end", None)
+
+    def _next(self) -> Tuple[str, Any]:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _accept(self, kind: str, value: Any = None) -> bool:
+        token = self._peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, kind: str, value: Any = None) -> Any:
+        token = self._next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            found = "the end" if token[0] == "end" else repr(token[1])
+            raise FilterSyntaxError(f"Expected {value or kind}, found {found}.")
+        return token[1]
+
+    def parse(self) -> _Node:
+        node = self._or()
+        if self._peek()[0] != "end":
+            raise FilterSyntaxError(f"Unexpected {self._peek()[1]!r}.")
+        return node
+
+    def _or(self) -> _Node:
+        children = [self._and()]
+        while self._accept("keyword", "OR"):
+            children.append(self._and())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def _and(self) -> _Node:
+        children = [self._not()]
+        while self._accept("keyword", "AND"):
+            children.append(self._not())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def _not(self) -> _Node:
+        if self._accept("keyword", "NOT"):
+            return self._not().negate()
+        if self._accept("symbol", "("):
+            node = self._or()
+            self._expect("symbol", ")")
+            return node
+        return self._predicate()
+
+    def _predicate(self) -> _Node:
+        field = self._expect("field")
+        negated = self._accept("keyword", "NOT")
+        if self._accept("keyword", "BETWEEN"):
+            low = self._expect("literal")
+            self._expect("keyword", "AND")
+            return _Between(field, low, self._expect("literal"), negated)
+        if self._accept("keyword", "IN"):
+            self._expect("symbol", "(")
+            values = [self._expect("literal")]
+            while self._accept("symbol", ","):
+                values.append(self._expect("literal"))
+            self._expect("symbol", ")")
+            return _In(field, values, negated)
+        if self._accept("keyword", "LIKE"):
+            pattern = self._expect("literal")
+            if not isinstance(pattern, str):
+                raise FilterSyntaxError(f"LIKE needs a text pattern, not {pattern!r}.")
+            return _Like(field, pattern, negated)
+        if negated:
+            raise FilterSyntaxError("NOT must be followed by BETWEEN, IN or LIKE.")
+        if self._accept("keyword", "IS"):
+            negated = self._accept("keyword", "NOT")
+            self._expect("keyword", "NULL")
+            return _IsNull(field, negated)
+        op = self._expect("symbol")
+        op = {"==": "=", "<>": "!="}.get(op, op)
+        if op not in _COMPARISONS:
+            raise FilterSyntaxError(f"Unknown operator {op!r}.")
+        return _Comparison(field, op, self._expect("literal"))
+
+
+class FilterPlan:
+    """
+    Compiled filter expression that selects the rows of each batch.
+
+    ``AND`` evaluates each condition only on the rows that are still selected, and
+    ``OR`` only on the rows that haven't passed yet, so later conditions read few
+    rows once a selective condition has run. Rows where a condition is null fail,
+    as in SQL.
+
+    Parameters
+    ----------
+    expression
+        The filter expression.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self._root = _Parser(expression).parse()
+
+    @property
+    def fields(self) -> FrozenSet[str]:
+        """Names of the fields the expression reads."""
+        return self._root.fields
+
+    def select(self, table: "pa.Table") -> np.ndarray:
+        """Return the sorted indices of the rows that pass the filter."""
+        selection = self._root.select(table, None)
+        if isinstance(selection, np.ndarray):
+            return selection
+        return np.flatnonzero(_as_mask(selection, table.num_rows).to_numpy(False))
+
+    def split(
+        self, table: "pa.Table", keep_failed: bool = True
+    ) -> Tuple["pa.Table", Optional["pa.Table"]]:
+        """
+        Return the rows that pass the filter and, with ``keep_failed``, those that fail.
+
+        When every row passes or every row fails, the batch is returned without a copy.
+        """
+        selection = self._root.select(table, None)
+        if isinstance(selection, np.ndarray):
+            if not len(selection):
+                return table.slice(0, 0), table if keep_failed else None
+            passed = table.take(selection)
+        else:
+            selection = _as_mask(selection, table.num_rows)
+            if _count(selection, table.num_rows) == table.num_rows:
+                return table, table.slice(0, 0) if keep_failed else None
+            passed = table.filter(selection)
+        if not keep_failed:
+            return passed, None
+        return passed, table.filter(pc.invert(_as_mask(selection, table.num_rows)))
+
+
+@functools.lru_cache(maxsize=128)
+def compile_filter(expression: str) -> FilterPlan:
+    """
+    Parse a filter expression into a plan, once per expression and process.
+
+    Fields are written as ``[Field Name]`` or as plain names. Conditions are
+    ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``BETWEEN low AND high``,
+    ``IN (value, ...)``, ``LIKE 'pattern'``, ``IS NULL`` and ``IS NOT NULL``, combined
+    with ``AND``, ``OR``, ``NOT`` and parentheses. Raises FilterSyntaxError.
+    """
+    return FilterPlan(expression)
+
+
+class ExpressionFilter(PluginV2):
+    """Split records into the True and False anchors with a filter expression."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "ExpressionFilter"
+        expression = self.provider.tool_config.get("expression") or ""
+        self.write_false = str(self.provider.tool_config.get("writeFalse", True))
+        self.write_false = self.write_false.strip().lower() in ("true", "1")
+        self.plan: Optional[FilterPlan] = None
+        if not expression.strip():
+            self.provider.io.warn(
+                "No filter expression. No records will be allowed through."
+            )
+        else:
+            try:
+                self.plan = compile_filter(expression)
+            except FilterSyntaxError as e:
+                raise WorkflowRuntimeError(f"Invalid filter expression: {e}")
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Evaluate the compiled plan on the batch.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        if self.plan is None:
+            passed, failed = batch.slice(0, 0), batch
+        else:
+            missing = self.plan.fields.difference(batch.column_names)
+            if missing:
+                raise WorkflowRuntimeError(f"Missing fields: {', '.join(missing)}")
+            try:
+                passed, failed = self.plan.split(batch, self.write_false)
+            except (ValueError, TypeError, pa.ArrowException) as e:
+                raise WorkflowRuntimeError(f"Can't evaluate the filter: {e}")
+        if passed.num_rows:
+            self.provider.write_to_anchor("True", passed)
+        if self.write_false and failed is not None and failed.num_rows:
+            self.provider.write_to_anchor("False", failed)
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Clean up any plugin resources."""
+        self.provider.io.info(f"{self.name} finished.")
@@ -0,0 +1,210 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that keeps fixeddecimal fields exact with Arrow decimal arrays."""
+from decimal import Decimal, localcontext
+from typing import Dict, List, Union
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import create_schema, get_metadata
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ArrowArray = Union[pa.Array, pa.ChunkedArray]
+
+MAX_DECIMAL128_PRECISION = 38
+MAX_DECIMAL256_PRECISION = 76
+
+
+def decimal_type(precision: int, scale: int) -> "pa.DataType":
+    """Return the smallest Arrow decimal type that holds ``precision`` digits."""
+    if precision <= MAX_DECIMAL128_PRECISION:
+        return pa.decimal128(precision, scale)
+    if precision <= MAX_DECIMAL256_PRECISION:
+        return pa.decimal256(precision, scale)
+    raise ValueError(
+        f"Decimals are limited to {MAX_DECIMAL256_PRECISION} digits, "
+        f"{precision} were requested."
+    )
+
+
+def fixeddecimal_type(size: int, scale: int) -> "pa.DataType":
+    """
+    Return the Arrow decimal type for a fixeddecimal field.
+
+    ``size`` is the number of digits in the integer part and ``scale`` the number of
+    digits in the fractional part, as in the field metadata.
+    """
+    return decimal_type(size + scale, scale)
+
+
+def rescale(
+    values: ArrowArray, scale: int, round_mode: str = "half_to_even"
+) -> ArrowArray:
+    """
+    Change the scale of decimal values.
+
+    Increasing the scale is exact and keeps the number of integer digits. Decreasing
+    it rounds with ``round_mode``, one of the modes of ``pyarrow.compute.round``; the
+    default is banker's rounding. Rounding can carry into a new integer digit (9.99
+    becomes 10), so the result has 1 more integer digit than the input.
+    """
+    current = values.type
+    if not pa.types.is_decimal(current):
+        raise TypeError(f"Expected decimal values, got {current}.")
+    integer_digits = current.precision - current.scale
+    if scale < current.scale:
+        integer_digits += 1
+        # Round in a type with room for the carry, or it doesn't fit.
+        wider = min(current.precision + 1, MAX_DECIMAL256_PRECISION)
+        values = pc.cast(values, decimal_type(wider, current.scale))
+        values = pc.round(values, ndigits=scale, round_mode=round_mode)
+    precision = min(max(1, integer_digits + scale), MAX_DECIMAL256_PRECISION)
+    return pc.cast(values, decimal_type(precision, scale))
+
+
+def to_decimal(
+    values: ArrowArray, size: int, scale: int, round_mode: str = "half_to_even"
+) -> ArrowArray:
+    """
+    Convert values to the decimal type of a fixeddecimal field.
+
+    Decimal, integer and string values are converted exactly; decimals with more
+    fractional digits are rounded with ``round_mode``, but strings with more
+    fractional digits raise ``pyarrow.ArrowInvalid`` instead of being rounded.
+    Floating-point values are rounded to ``scale`` digits, since most decimal
+    fractions have no exact binary representation. Values that don't fit raise
+    ``pyarrow.ArrowInvalid``.
+    """
+    value_type = values.type
+    if pa.types.is_decimal(value_type):
+        values = rescale(values, scale, round_mode)
+    elif pa.types.is_integer(value_type):
+        values = rescale(pc.cast(values, pa.decimal128(20, 0)), scale)
+    elif pa.types.is_floating(value_type):
+        values = pc.round(values, ndigits=scale, round_mode=round_mode)
+    return pc.cast(values, fixeddecimal_type(size, scale))
+
+
+def decimal_columns(table: "pa.Table") -> "pa.Table":
+    """Convert every fixeddecimal column to Arrow decimals, keeping field metadata."""
+    metadata = get_metadata(table)
+    for position, field in enumerate(table.schema):
+        meta = metadata.get(field.name) or {}
+        if meta.get("type") != FieldType.fixeddecimal:
+            continue
+        values = to_decimal(
+            table.column(position), int(meta["size"]), int(meta["scale"])
+        )
+        table = table.set_column(
+            position,
+            pa.field(field.name, values.type, field.nullable, field.metadata),
+            values,
+        )
+    return table
+
+
+class DecimalTotals(PluginV2):
+    """Exact totals of fixeddecimal fields, rounded to a configured scale."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "DecimalTotals"
+        fields = self.provider.tool_config.get("fields") or ""
+        self.fields: List[str] = [f.strip() for f in fields.split(",") if f.strip()]
+        if not self.fields:
+            raise WorkflowRuntimeError("Select at least one field to total.")
+        scale = self.provider.tool_config.get("scale")
+        try:
+            self.scale = 2 if scale is None or scale == "" else int(scale)
+        except ValueError:
+            raise WorkflowRuntimeError(f"The scale must be a number, not {scale!r}.")
+        if not 0 <= self.scale <= MAX_DECIMAL128_PRECISION:
+            raise WorkflowRuntimeError(
+                f"The scale must be between 0 and {MAX_DECIMAL128_PRECISION}."
+            )
+        self.size = MAX_DECIMAL128_PRECISION - self.scale
+        self.totals: Dict[str, Decimal] = {field: Decimal(0) for field in self.fields}
+        self.output_schema = create_schema(
+            {
+                "field": {"type": FieldType.v_string},
+                "total": {
+                    "type": FieldType.fixeddecimal,
+                    "size": self.size,
+                    "scale": self.scale,
+                },
+            }
+        )
+        self.provider.push_outgoing_metadata("Output", self.output_schema)
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Add the batch to the running totals.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        try:
+            batch = decimal_columns(batch.select(self.fields))
+        except (KeyError, ValueError) as e:
+            # ArrowInvalid is a ValueError, like the error of fixeddecimal_type for
+            # more than 76 digits.
+            raise WorkflowRuntimeError(f"Can't read decimal fields: {e}")
+        for field in self.fields:
+            if not pa.types.is_decimal(batch.schema.field(field).type):
+                raise WorkflowRuntimeError(f"{field} is not a fixeddecimal field.")
+            total = pc.sum(rescale(batch[field], self.scale)).as_py()
+            if total is not None:
+                # The default context rounds to 28 digits; keep every digit.
+                with localcontext() as context:
+                    context.prec = MAX_DECIMAL256_PRECISION
+                    self.totals[field] += total
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Write one record per field with its total."""
+        total_type = fixeddecimal_type(self.size, self.scale)
+        totals = pa.table(
+            {
+                "field": pa.array(self.fields, pa.string()),
+                "total": pa.array([self.totals[f] for f in self.fields], total_type),
+            }
+        )
+        self.provider.write_to_anchor("Output", totals.cast(self.output_schema))
+        self.provider.io.info(f"{self.name} finished.")
@@ -0,0 +1,229 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example lookup join tool that streams the data anchor through a hash index."""
+from typing import List, Optional
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pandas as pd
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def _key_index(table: "pa.Table", keys: List[str]) -> "pd.Index":
+    """Build a pandas index over the key columns of a table."""
+    if len(keys) == 1:
+        return pd.Index(table[keys[0]].to_pandas())
+    return pd.MultiIndex.from_arrays([table[key].to_pandas() for key in keys])
+
+
+def _null_key_mask(table: "pa.Table", keys: List[str]) -> np.ndarray:
+    """Return True for each row where any key column is null."""
+    mask = np.zeros(table.num_rows, dtype=bool)
+    for key in keys:
+        mask |= pc.is_null(table[key]).combine_chunks().to_numpy(zero_copy_only=False)
+    return mask
+
+
+class LookupJoin:
+    """
+    Hash join of a small lookup input against a streamed data input.
+
+    Lookup batches are collected until ``finish_lookup`` builds the index. Data
+    batches passed to ``probe`` before that are buffered and joined when the index
+    is ready; afterwards they are joined immediately. Null keys never match.
+
+    Parameters
+    ----------
+    keys
+        Names of the key columns; they must exist on both inputs.
+    how
+        ``"inner"``, ``"left"`` (keep unmatched data rows) or ``"semi"`` (keep data
+        rows that have a match, without lookup columns).
+    suffix
+        Appended to lookup column names that are also data column names.
+    """
+
+    JOIN_TYPES = ("inner", "left", "semi")
+
+    def __init__(self, keys: List[str], how: str = "inner", suffix: str = "_lookup"):
+        if how not in self.JOIN_TYPES:
+            raise ValueError(f"how must be one of {', '.join(self.JOIN_TYPES)}")
+        self.keys = keys
+        self.how = how
+        self.suffix = suffix
+        self._lookup_batches: List["pa.Table"] = []
+        self._pending: List["pa.Table"] = []
+        self._lookup: Optional["pa.Table"] = None
+        self._uniques: Optional["pd.Index"] = None
+        self._order = np.empty(0, dtype=np.intp)
+        self._offsets = np.zeros(1, dtype=np.intp)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the lookup index has been built."""
+        return self._uniques is not None
+
+    @property
+    def buffered_rows(self) -> int:
+        """Number of data rows waiting for the lookup index."""
+        return sum(batch.num_rows for batch in self._pending)
+
+    @property
+    def index_nbytes(self) -> int:
+        """Approximate memory held by the lookup table and its index, in bytes."""
+        if not self.ready:
+            return sum(batch.nbytes for batch in self._lookup_batches)
+        return (
+            self._lookup.nbytes  # type: ignore
+            + int(self._uniques.memory_usage(deep=True))  # type: ignore
+            + self._order.nbytes
+            + self._offsets.nbytes
+        )
+
+    def add_lookup(self, batch: "pa.Table") -> None:
+        """Collect one record batch from the lookup input."""
+        if self.ready:
+            raise RuntimeError("The lookup index has already been built.")
+        self._lookup_batches.append(batch)
+
+    def finish_lookup(self) -> List["pa.Table"]:
+        """Build the index and return the joined output of any buffered data batches."""
+        if self._lookup_batches:
+            lookup = pa.concat_tables(self._lookup_batches)
+        else:
+            lookup = pa.table({key: pa.array([]) for key in self.keys})
+        self._lookup_batches = []
+        lookup = lookup.filter(pa.array(~_null_key_mask(lookup, self.keys)))
+
+        codes, self._uniques = _key_index(lookup, self.keys).factorize()
+        self._order = np.argsort(codes, kind="stable")
+        sizes = np.bincount(codes, minlength=len(self._uniques))
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.intp)
+        if self.how == "semi":
+            self._lookup = lookup.drop(lookup.column_names)
+        else:
+            self._lookup = lookup.drop(self.keys)
+
+        pending, self._pending = self._pending, []
+        return [self._join(batch) for batch in pending]
+
+    def probe(self, batch: "pa.Table") -> Optional["pa.Table"]:
+        """Join a data batch, or buffer it and return None if the index isn't ready."""
+        if not self.ready:
+            self._pending.append(batch)
+            return None
+        return self._join(batch)
+
+    def _join(self, batch: "pa.Table") -> "pa.Table":
+        codes = self._uniques.get_indexer(_key_index(batch, self.keys))  # type: ignore
+        codes[_null_key_mask(batch, self.keys)] = -1
+        matched = codes >= 0
+
+        if self.how == "semi":
+            return batch.filter(pa.array(matched))
+
+        starts = np.where(matched, self._offsets[codes], 0)
+        counts = np.where(matched, self._offsets[codes + 1] - starts, 0)
+        if self.how == "left":
+            counts = np.where(matched, counts, 1)
+
+        data_rows = np.repeat(np.arange(batch.num_rows), counts)
+        first_output_row = np.cumsum(counts) - counts
+        positions = (
+            np.arange(data_rows.size)
+            - np.repeat(first_output_row, counts)
+            + np.repeat(starts, counts)
+        )
+        has_match = np.repeat(matched, counts)
+        lookup_rows = np.zeros(data_rows.size, dtype=np.intp)
+        lookup_rows[has_match] = self._order[positions[has_match]]
+        lookup_rows = pa.array(lookup_rows, mask=~has_match)
+
+        joined = batch.take(pa.array(data_rows))
+        lookup = self._lookup
+        for name, column in zip(lookup.column_names, lookup.columns):  # type: ignore
+            if name in joined.column_names:
+                name += self.suffix
+            joined = joined.append_column(name, column.take(lookup_rows))
+        return joined
+
+
+class LookupJoinTool(PluginV2):
+    """Join each batch from the Data anchor to the rows of the Lookup anchor."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "LookupJoinTool"
+        keys = self.provider.tool_config.get("keys") or ""
+        if not keys:
+            raise WorkflowRuntimeError("No join keys selected.")
+        self.join = LookupJoin(
+            keys.split(","), how=self.provider.tool_config.get("joinType") or "inner"
+        )
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Index lookup batches, and join data batches as soon as the index is ready.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        if anchor.name == "Lookup":
+            self.join.add_lookup(batch)
+            return
+        joined = self.join.probe(batch)
+        if joined is not None:
+            self.provider.write_to_anchor("Output", joined)
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Build the lookup index when the Lookup connection is complete.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        if anchor.name != "Lookup":
+            return
+        buffered_rows = self.join.buffered_rows
+        for joined in self.join.finish_lookup():
+            self.provider.write_to_anchor("Output", joined)
+        self.provider.io.info(
+            f"{self.name} lookup index uses {self.join.index_nbytes} bytes; "
+            f"joined {buffered_rows} buffered data rows."
+        )
+
+    def on_complete(self) -> None:
+        """Join any data that arrived without a Lookup connection."""
+        if not self.join.ready:
+            for joined in self.join.finish_lookup():
+                self.provider.write_to_anchor("Output", joined)
+        self.provider.io.info(f"{self.name} finished.")
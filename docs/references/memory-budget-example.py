@@ -0,0 +1,324 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that tracks its memory use against a budget and adapts to it."""
+import contextlib
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import psutil
+
+import pyarrow as pa
+
+MB = 1024 * 1024
+
+
+class MemoryUsage(NamedTuple):
+    """A snapshot of the memory used by the plugin process."""
+
+    arrow_bytes: int
+    arrow_peak_bytes: int
+    rss_bytes: int
+
+    @property
+    def used_bytes(self) -> int:
+        """The larger of the RSS and the Arrow allocations, counted against a budget."""
+        return max(self.rss_bytes, self.arrow_bytes)
+
+
+class CallbackStats(NamedTuple):
+    """Memory statistics of a tracked plugin callback."""
+
+    calls: int
+    peak_used_bytes: int
+    total_growth_bytes: int
+
+
+class MemoryBudgetExceeded(WorkflowRuntimeError):
+    """Raised when a plugin uses more memory than its hard limit."""
+
+    def __init__(self, usage: MemoryUsage, limit_bytes: int) -> None:
+        super().__init__(
+            f"Memory use of {usage.used_bytes // MB} MB exceeds the budget of "
+            f"{limit_bytes // MB} MB."
+        )
+        self.usage = usage
+        self.limit_bytes = limit_bytes
+
+
+def default_limit(fraction: float = 0.5) -> int:
+    """Return a share of the memory that is available now, plus what is already used."""
+    used = psutil.Process().memory_info().rss
+    return int(used + psutil.virtual_memory().available * fraction)
+
+
+class MemoryBudget:
+    """
+    Memory budget of a plugin process, checked against Arrow and process statistics.
+
+    Python SDK tools run out-of-process, each in its own Python process, so the
+    process RSS is the memory of this tool alone. Crossing the soft limit calls the
+    ``on_soft_limit`` callbacks once, until usage drops below the soft limit again;
+    crossing the hard limit calls the ``on_hard_limit`` callbacks and, if they don't
+    free enough memory, raises MemoryBudgetExceeded.
+
+    Parameters
+    ----------
+    limit_bytes
+        The hard limit; the default is half of the memory available at start-up.
+    soft_fraction
+        The soft limit as a fraction of the hard limit.
+    pool
+        The Arrow memory pool to report; the default pool if not given.
+    min_interval
+        Minimum number of seconds between two measurements; ``check`` and ``track``
+        reuse the previous snapshot in between, which keeps checks cheap for small
+        batches.
+    """
+
+    def __init__(
+        self,
+        limit_bytes: Optional[int] = None,
+        soft_fraction: float = 0.8,
+        pool: Optional["pa.MemoryPool"] = None,
+        min_interval: float = 0.0,
+    ) -> None:
+        self.limit_bytes = limit_bytes or default_limit()
+        self.soft_limit_bytes = int(self.limit_bytes * soft_fraction)
+        self.pool = pool or pa.default_memory_pool()
+        self.min_interval = min_interval
+        self._process = psutil.Process()
+        self._soft_callbacks: List[Callable[[MemoryUsage], None]] = []
+        self._hard_callbacks: List[Callable[[MemoryUsage], None]] = []
+        self._over_soft_limit = False
+        self._last_check = 0.0
+        self._last_usage: Optional[MemoryUsage] = None
+        self.stats: Dict[str, CallbackStats] = {}
+
+    def usage(self) -> MemoryUsage:
+        """Return the current memory use."""
+        return MemoryUsage(
+            arrow_bytes=self.pool.bytes_allocated(),
+            arrow_peak_bytes=self.pool.max_memory() or 0,
+            rss_bytes=self._process.memory_info().rss,
+        )
+
+    def on_soft_limit(self, callback: Callable[[MemoryUsage], None]) -> None:
+        """Call ``callback(usage)`` when usage crosses the soft limit."""
+        self._soft_callbacks.append(callback)
+
+    def on_hard_limit(self, callback: Callable[[MemoryUsage], None]) -> None:
+        """Call ``callback(usage)`` to free memory when usage crosses the hard limit."""
+        self._hard_callbacks.append(callback)
+
+    @property
+    def over_soft_limit(self) -> bool:
+        """Whether the last check was above the soft limit."""
+        return self._over_soft_limit
+
+    def _recent(self) -> Optional[MemoryUsage]:
+        """Return the last snapshot if it was taken less than ``min_interval`` ago."""
+        if time.monotonic() - self._last_check < self.min_interval:
+            return self._last_usage
+        return None
+
+    def check(self) -> MemoryUsage:
+        """
+        Compare the current usage with the limits and run the callbacks.
+
+        Raises MemoryBudgetExceeded if usage is still above the hard limit after the
+        ``on_hard_limit`` callbacks have run.
+        """
+        recent = self._recent()
+        if recent is not None:
+            return recent
+        return self._apply(self.usage())
+
+    def _apply(self, usage: MemoryUsage) -> MemoryUsage:
+        self._last_check = time.monotonic()
+        if usage.used_bytes >= self.limit_bytes:
+            for callback in self._hard_callbacks:
+                callback(usage)
+            self.release_unused()
+            usage = self.usage()
+            if usage.used_bytes >= self.limit_bytes:
+                raise MemoryBudgetExceeded(usage, self.limit_bytes)
+        over_soft_limit = usage.used_bytes >= self.soft_limit_bytes
+        if over_soft_limit and not self._over_soft_limit:
+            for callback in self._soft_callbacks:
+                callback(usage)
+        self._over_soft_limit = over_soft_limit
+        self._last_usage = usage
+        return usage
+
+    def release_unused(self) -> None:
+        """Return memory that the Arrow pool keeps cached to the operating system."""
+        release_unused = getattr(self.pool, "release_unused", None)
+        if release_unused is not None:
+            release_unused()
+
+    @contextlib.contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        """
+        Check the budget around a block of code and record its statistics as ``name``.
+
+        Use it around the body of each plugin callback:
+
+            with self.budget.track("on_record_batch"):
+                ...
+        """
+        before = self.check()
+        try:
+            yield
+        finally:
+            recent = self._recent()
+            after = recent or self.usage()
+            stats = self.stats.get(name, CallbackStats(0, 0, 0))
+            self.stats[name] = CallbackStats(
+                calls=stats.calls + 1,
+                peak_used_bytes=max(stats.peak_used_bytes, after.used_bytes),
+                total_growth_bytes=stats.total_growth_bytes
+                + max(0, after.used_bytes - before.used_bytes),
+            )
+        if recent is None:
+            self._apply(after)
+
+
+class AdaptiveBatchSize:
+    """
+    Batch size that shrinks under memory pressure and grows back when it is gone.
+
+    Parameters
+    ----------
+    budget
+        The budget to follow.
+    initial
+        The starting number of records.
+    minimum
+        The smallest batch size.
+    maximum
+        The largest batch size.
+    """
+
+    def __init__(
+        self,
+        budget: MemoryBudget,
+        initial: int = 100_000,
+        minimum: int = 1_000,
+        maximum: int = 1_000_000,
+    ) -> None:
+        self.budget = budget
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = initial
+
+    def next_size(self) -> int:
+        """Return the number of records for the next batch."""
+        usage = self.budget.check()
+        if self.budget.over_soft_limit:
+            self.size = max(self.minimum, self.size // 2)
+        elif usage.used_bytes < self.budget.soft_limit_bytes // 2:
+            self.size = min(self.maximum, self.size + self.size // 4)
+        return self.size
+
+
+class BatchCoalescer(PluginV2):
+    """Combine small incoming batches into larger ones within a memory budget."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "BatchCoalescer"
+        limit_mb = self.provider.tool_config.get("memoryLimitMB")
+        try:
+            limit_bytes = int(limit_mb) * MB if limit_mb else None
+        except ValueError:
+            raise WorkflowRuntimeError(
+                f"The memory limit must be a number of MB, not {limit_mb!r}."
+            )
+        if limit_bytes is not None and limit_bytes <= 0:
+            raise WorkflowRuntimeError("The memory limit must be more than 0 MB.")
+        self.budget = MemoryBudget(limit_bytes)
+        self.budget.on_soft_limit(self._on_soft_limit)
+        self.budget.on_hard_limit(lambda usage: self.flush())
+        self.batch_size = AdaptiveBatchSize(self.budget)
+        self.buffered: List["pa.Table"] = []
+        self.buffered_rows = 0
+        self.provider.io.info(
+            f"{self.name} initialized with a budget of "
+            f"{self.budget.limit_bytes // MB} MB."
+        )
+
+    def _on_soft_limit(self, usage: MemoryUsage) -> None:
+        self.provider.io.warn(
+            f"{self.name} is using {usage.used_bytes // MB} MB of its "
+            f"{self.budget.limit_bytes // MB} MB budget; writing smaller batches."
+        )
+        self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records as one batch."""
+        if self.buffered:
+            self.provider.write_to_anchor("Output", pa.concat_tables(self.buffered))
+            self.buffered = []
+            self.buffered_rows = 0
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Buffer the batch and write the buffer once it is large enough.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        with self.budget.track("on_record_batch"):
+            self.buffered.append(batch)
+            self.buffered_rows += batch.num_rows
+            if self.buffered_rows >= self.batch_size.next_size():
+                self.flush()
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.flush()
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Write the remaining records and report the memory statistics."""
+        self.flush()
+        stats = self.budget.stats.get("on_record_batch")
+        if stats:
+            self.provider.io.info(
+                f"{self.name} peaked at {stats.peak_used_bytes // MB} MB "
+                f"over {stats.calls} batches."
+            )
+        self.provider.io.info(f"{self.name} finished.")
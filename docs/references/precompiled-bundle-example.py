@@ -0,0 +1,329 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Example post-build step that precompiles the plugins in a YXI for faster startup.
+
+Run it with the same Python version that Designer uses for the plugin (3.8):
+
+    python precompiled-bundle-example.py build/yxi/MyTools.yxi --measure pandas
+
+Every shiv artifact (``.pyz``) in the YXI is rewritten so that pure-Python packages
+are byte-compiled and stored in a single zip file that is imported with ``zipimport``,
+and top-level imports are resolved from a precomputed index instead of a scan of
+``sys.path``.
+"""
+import argparse
+import hashlib
+import io
+import json
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+VENDOR_ZIP = "_ayx_vendor.zip"
+INDEX_MODULE = "_ayx_import_index"
+PURE_SUFFIXES = {".py", ".pyi", ".typed"}
+PRESERVED_SUFFIXES = {".dist-info", ".egg-info", ".data", ".pth"}
+
+INDEX_MODULE_SOURCE = '''"""Resolve top-level imports from a precomputed index."""
+import importlib.machinery
+import json
+import os
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+class IndexedPathFinder:
+    """Find top-level modules in the path entry recorded for them at build time."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def find_spec(self, fullname, path=None, target=None):
+        if path is not None or fullname not in self.index:
+            return None
+        entry = os.path.join(_here, self.index[fullname])
+        return importlib.machinery.PathFinder.find_spec(fullname, [entry], target)
+
+
+with open(os.path.join(_here, "_ayx_import_index.json"), encoding="utf-8") as _file:
+    _finder = IndexedPathFinder(json.load(_file))
+
+# Run after the builtin and frozen finders, like the path entries it replaces.
+for _position, _entry in enumerate(sys.meta_path):
+    if _entry is importlib.machinery.PathFinder:
+        break
+else:
+    _position = len(sys.meta_path)
+sys.meta_path.insert(_position, _finder)
+'''
+
+
+def _top_level_name(entry: Path) -> str:
+    return entry.name.split(".")[0]
+
+
+def stdlib_names() -> FrozenSet[str]:
+    """
+    Return the top-level module names of the running Python's standard library.
+
+    Python 3.10 lists them in ``sys.stdlib_module_names``; on older versions, they are
+    read from the standard library directories.
+    """
+    names = getattr(sys, "stdlib_module_names", None)
+    if names is not None:
+        return frozenset(names)
+    found = set(sys.builtin_module_names)
+    stdlib = Path(sysconfig.get_paths()["stdlib"])
+    for directory in (stdlib, stdlib / "lib-dynload", Path(sys.base_prefix) / "DLLs"):
+        if directory.is_dir():
+            found.update(
+                _top_level_name(entry)
+                for entry in directory.iterdir()
+                if entry.name not in ("site-packages", "__pycache__")
+            )
+    return frozenset(found)
+
+
+def classify(site_packages: Path) -> Tuple[List[Path], List[Path]]:
+    """
+    Split the top-level entries of a site-packages directory into pure and other.
+
+    An entry is pure if it is a ``.py`` module, or a package that only contains Python
+    source files. Packages with extension modules, sourceless ``.pyc`` modules or data
+    files, and namespace packages, stay on disk since they might rely on opening
+    files next to their modules.
+    """
+    pure, other = [], []
+    for entry in sorted(site_packages.iterdir()):
+        if entry.suffix in PRESERVED_SUFFIXES or entry.name == "__pycache__":
+            other.append(entry)
+        elif entry.is_file():
+            (pure if entry.suffix == ".py" else other).append(entry)
+        elif not (entry / "__init__.py").is_file():
+            # Namespace packages can't be split between a zip file and the disk.
+            other.append(entry)
+        elif all(
+            path.suffix in PURE_SUFFIXES
+            for path in entry.rglob("*")
+            if path.is_file() and "__pycache__" not in path.parts
+        ):
+            pure.append(entry)
+        else:
+            other.append(entry)
+    return pure, other
+
+
+def _python_files(entry: Path) -> Iterable[Path]:
+    if entry.is_file():
+        yield entry
+    else:
+        yield from (
+            path
+            for path in sorted(entry.rglob("*.py"))
+            if "__pycache__" not in path.parts
+        )
+
+
+def build_vendor_zip(
+    site_packages: Path, pure: List[Path], keep_source: bool = False, optimize: int = 0
+) -> Path:
+    """
+    Byte-compile pure entries into ``site-packages/_ayx_vendor.zip`` and remove them.
+
+    Modules are stored uncompressed as sourceless ``.pyc`` files with unchecked
+    hash-based invalidation, so ``zipimport`` loads them without decompressing,
+    compiling or checking timestamps. Pass ``keep_source`` to also store the ``.py``
+    files, which keeps source lines in tracebacks.
+    """
+    zip_path = site_packages / VENDOR_ZIP
+    with tempfile.TemporaryDirectory() as build_dir, zipfile.ZipFile(
+        zip_path, "w", zipfile.ZIP_STORED
+    ) as vendor:
+        for entry in pure:
+            for source in _python_files(entry):
+                name = source.relative_to(site_packages).as_posix()
+                compiled = Path(build_dir) / (name + "c")
+                py_compile.compile(
+                    str(source),
+                    cfile=str(compiled),
+                    dfile=name,
+                    doraise=True,
+                    optimize=optimize,
+                    invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+                )
+                vendor.write(compiled, name + "c")
+                if keep_source:
+                    vendor.write(source, name)
+    for entry in pure:
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    return zip_path
+
+
+def write_import_index(
+    site_packages: Path, pure: List[Path], other: List[Path]
+) -> None:
+    """
+    Write the import index, the module that installs it, and the ``.pth`` hook.
+
+    Packages named like a standard library module (such as the ``dataclasses``
+    backport) are left out of the index, so the standard library still takes
+    precedence over them.
+    """
+    index: Dict[str, str] = {}
+    for entry in other:
+        if entry.suffix not in PRESERVED_SUFFIXES and entry.name != "__pycache__":
+            index[_top_level_name(entry)] = "."
+    for entry in pure:
+        index[_top_level_name(entry)] = VENDOR_ZIP
+    for name in stdlib_names() & index.keys():
+        del index[name]
+    (site_packages / f"{INDEX_MODULE}.json").write_text(
+        json.dumps(index, sort_keys=True), "utf-8"
+    )
+    (site_packages / f"{INDEX_MODULE}.py").write_text(INDEX_MODULE_SOURCE, "utf-8")
+    (site_packages / f"{INDEX_MODULE}.pth").write_text(
+        f"{VENDOR_ZIP}\nimport {INDEX_MODULE}\n", "utf-8"
+    )
+
+
+def time_imports(site_packages: Path, modules: List[str], repeat: int = 5) -> float:
+    """
+    Return the median time, in seconds, to start Python and import ``modules``.
+
+    The imports run against a copy of ``site_packages``, so the ``__pycache__``
+    directories they create don't end up in the artifact. The first, compiling run
+    is not timed, matching shiv's ``--compile-pyc`` extraction.
+    """
+    with tempfile.TemporaryDirectory() as copy_dir:
+        copy = Path(copy_dir) / "site-packages"
+        shutil.copytree(site_packages, copy)
+        script = f"import site; site.addsitedir({str(copy)!r}); " + "; ".join(
+            f"import {module}" for module in modules
+        )
+        timings = []
+        for _ in range(repeat + 1):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-I", "-c", script], check=True)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings[1:])
+
+
+def _split_preamble(data: bytes) -> Tuple[bytes, bytes]:
+    start = data.find(b"PK\x03\x04")
+    return data[:start], data[start:]
+
+
+def rewrite_pyz(data: bytes, args: argparse.Namespace) -> bytes:
+    """Return a copy of a shiv artifact with its site-packages precompiled."""
+    preamble, archive = _split_preamble(data)
+    with tempfile.TemporaryDirectory() as work_dir:
+        root = Path(work_dir)
+        with zipfile.ZipFile(io.BytesIO(archive)) as pyz:
+            pyz.extractall(root)
+        site_packages = root / "site-packages"
+        if not site_packages.is_dir():
+            raise SystemExit("Not a shiv artifact: site-packages not found.")
+
+        candidates, other = classify(site_packages)
+        pure = [e for e in candidates if _top_level_name(e) not in args.exclude]
+        other.extend(entry for entry in candidates if entry not in pure)
+        if args.measure:
+            before = time_imports(site_packages, args.measure, args.repeat)
+        build_vendor_zip(site_packages, pure, args.keep_source, args.optimize)
+        write_import_index(site_packages, pure, other)
+        if args.measure:
+            after = time_imports(site_packages, args.measure, args.repeat)
+            print(
+                f"Startup with {', '.join(args.measure)}: "
+                f"{before * 1000:.0f} ms before, {after * 1000:.0f} ms after."
+            )
+        print(f"Packed {len(pure)} pure-Python entries into {VENDOR_ZIP}.")
+
+        # shiv extracts each build_id only once, so a changed artifact needs a new one.
+        environment_path = root / "environment.json"
+        environment = json.loads(environment_path.read_text("utf-8"))
+        digest = hashlib.sha256()
+        for path in sorted(site_packages.rglob("*")):
+            if path.is_file():
+                digest.update(path.relative_to(root).as_posix().encode("utf-8"))
+                digest.update(path.read_bytes())
+        environment["build_id"] = digest.hexdigest()
+        environment_path.write_text(json.dumps(environment), "utf-8")
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as pyz:
+            for path in sorted(root.rglob("*")):
+                if path.is_file():
+                    pyz.write(path, path.relative_to(root).as_posix())
+    return preamble + output.getvalue()
+
+
+def rewrite_yxi(yxi_path: Path, output_path: Path, args: argparse.Namespace) -> None:
+    """Copy a YXI, rewriting every shiv artifact inside it."""
+    with zipfile.ZipFile(yxi_path) as source, zipfile.ZipFile(
+        output_path, "w", zipfile.ZIP_DEFLATED
+    ) as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename.endswith(".pyz"):
+                print(f"Rewriting {info.filename}...")
+                data = rewrite_pyz(data, args)
+            target.writestr(info, data)
+
+
+def main() -> None:
+    """Parse the command line and rewrite the YXI."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("yxi", type=Path, help="YXI created by create-yxi")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="defaults to <name>-precompiled.yxi"
+    )
+    parser.add_argument(
+        "--exclude", action="append", default=[], help="package to leave on disk"
+    )
+    parser.add_argument(
+        "--keep-source", action="store_true", help="also store .py files in the zip"
+    )
+    parser.add_argument("--optimize", type=int, default=0, choices=[0, 1, 2])
+    parser.add_argument(
+        "--measure", action="append", default=[], help="module to import when timing"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if sys.version_info[:2] != (3, 8):
+        print(
+            "Warning: .pyc files only load on the Python version that compiled them. "
+            "Designer runs plugins on Python 3.8."
+        )
+    output = args.output or args.yxi.with_name(f"{args.yxi.stem}-precompiled.yxi")
+    rewrite_yxi(args.yxi, output, args)
+    print(f"Created {output}")
+
+
+if __name__ == "__main__":
+    main()
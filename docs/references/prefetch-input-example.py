@@ -0,0 +1,266 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example input tool that reads ahead in a background thread while it writes."""
+import glob
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import create_schema
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import pyarrow as pa
+import pyarrow.csv as csv
+
+T = TypeVar("T")
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class PrefetchStats:
+    """Counters of a prefetching reader, to find the slower of the 2 stages."""
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.max_depth = 0
+        self._depth_total = 0
+        self.reader_blocked_seconds = 0.0
+        self.consumer_stalled_seconds = 0.0
+
+    def add_item(self, depth: int) -> None:
+        """Count an item that was taken from a queue holding ``depth`` items."""
+        self.items += 1
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+
+    @property
+    def mean_depth(self) -> float:
+        """The average number of queued items when the consumer asked for one."""
+        return self._depth_total / self.items if self.items else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.items} items, queue depth {self.mean_depth:.1f} on average "
+            f"(max {self.max_depth}), reader blocked "
+            f"{self.reader_blocked_seconds:.2f} s, consumer stalled "
+            f"{self.consumer_stalled_seconds:.2f} s"
+        )
+
+
+class PrefetchReader(Generic[T]):
+    """
+    Iterate over a source in a background thread, through a bounded queue.
+
+    The reader thread stays at most ``depth`` items ahead of the consumer, so memory
+    is bounded while reading overlaps with the consumer's work. Exceptions from the
+    source are raised in the consumer's thread. The reader can only be iterated once;
+    iterating it again, or after ``close``, yields nothing. A long
+    ``consumer_stalled_seconds`` means reading is the slow stage; a long
+    ``reader_blocked_seconds`` means the consumer is.
+
+    Parameters
+    ----------
+    source
+        The items to read, such as the result of ``csv_batches`` or ``paged_batches``.
+    depth
+        The maximum number of items read ahead.
+    """
+
+    def __init__(self, source: Iterable[T], depth: int = 4) -> None:
+        if depth < 1:
+            raise ValueError("depth must be at least 1.")
+        self.stats = PrefetchStats()
+        self._source = source
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Any) -> bool:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                self.stats.reader_blocked_seconds += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self) -> None:
+        try:
+            for item in self._source:
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._put(_Failure(e))
+            return
+        self._put(_END)
+
+    def __iter__(self) -> Iterator[T]:
+        while not self._finished:
+            depth = self._queue.qsize()
+            start = time.perf_counter()
+            item = self._queue.get()
+            if depth == 0:
+                self.stats.consumer_stalled_seconds += time.perf_counter() - start
+            if item is _END:
+                self._finished = True
+                return
+            if isinstance(item, _Failure):
+                self._finished = True
+                raise item.error
+            self.stats.add_item(depth)
+            yield item
+
+    def close(self) -> None:
+        """Stop the reader thread and wait for it to finish."""
+        self._finished = True
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "PrefetchReader[T]":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def csv_batches(
+    paths: Iterable[Path],
+    read_options: Optional["csv.ReadOptions"] = None,
+    convert_options: Optional["csv.ConvertOptions"] = None,
+) -> Iterator[Tuple[Path, "pa.Table"]]:
+    """
+    Stream ``(path, batch)`` pairs from CSV files, one block of records at a time.
+
+    The size of the batches is set by ``read_options.block_size``.
+    """
+    for path in paths:
+        reader = csv.open_csv(
+            str(path), read_options=read_options, convert_options=convert_options
+        )
+        for batch in reader:
+            yield path, pa.Table.from_batches([batch])
+
+
+def glob_paths(pattern: str) -> List[Path]:
+    """Return the files that match a glob pattern, sorted by name."""
+    return sorted(Path(path) for path in glob.glob(pattern, recursive=True))
+
+
+def paged_batches(
+    fetch_page: Callable[[Optional[Any]], Tuple[List[Dict[str, Any]], Optional[Any]]],
+    schema: "pa.Schema",
+) -> Iterator["pa.Table"]:
+    """
+    Stream the pages of a paginated API as tables.
+
+    ``fetch_page(token)`` is called with None first, then with the token that the
+    previous call returned, and returns a page of records (dictionaries) and the
+    next token, or None after the last page.
+    """
+    token = None
+    while True:
+        records, token = fetch_page(token)
+        if records:
+            columns = {
+                name: [record.get(name) for record in records] for name in schema.names
+            }
+            yield pa.table(columns, schema=schema)
+        if token is None:
+            return
+
+
+class PrefetchCsvInput(PluginV2):
+    """Read the CSV files that match a pattern while earlier batches are written."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "PrefetchCsvInput"
+        self.pattern = self.provider.tool_config.get("pattern") or ""
+        columns = self.provider.tool_config.get("columns") or ""
+        self.columns = [c.strip() for c in columns.split(",") if c.strip()]
+        if not self.pattern or not self.columns:
+            raise WorkflowRuntimeError("Select a file pattern and the columns to read.")
+        self.depth = int(self.provider.tool_config.get("prefetchDepth") or 4)
+        self.output_schema = create_schema(
+            {
+                "file_name": {"type": FieldType.v_wstring},
+                **{column: {"type": FieldType.v_wstring} for column in self.columns},
+            }
+        )
+        self.provider.push_outgoing_metadata("Output", self.output_schema)
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """Input tools don't receive batches."""
+        raise NotImplementedError("Input tools don't receive batches.")
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """Input tools don't have incoming connections."""
+        raise NotImplementedError("Input tools don't receive incoming connections.")
+
+    def on_complete(self) -> None:
+        """Read the files in the background and write each batch as it arrives."""
+        paths = glob_paths(self.pattern)
+        if not paths:
+            self.provider.io.warn(f"No files match {self.pattern}.")
+        convert_options = csv.ConvertOptions(
+            include_columns=self.columns,
+            column_types={column: pa.string() for column in self.columns},
+        )
+
+        def source() -> Iterator[Tuple[Path, "pa.Table"]]:
+            # Runs in the reader thread; the reader raises the error in on_complete.
+            for path in paths:
+                try:
+                    yield from csv_batches([path], convert_options=convert_options)
+                except (pa.ArrowException, OSError) as e:
+                    raise WorkflowRuntimeError(f"Can't read {path}: {e}")
+
+        with PrefetchReader(source(), self.depth) as reader:
+            for path, batch in reader:
+                file_name = pa.array([path.name] * batch.num_rows, pa.string())
+                self.provider.write_to_anchor(
+                    "Output",
+                    pa.Table.from_arrays(
+                        [file_name, *batch.select(self.columns).columns],
+                        schema=self.output_schema,
+                    ),
+                )
+            self.provider.io.info(f"{self.name} read {reader.stats}.")
+        self.provider.io.info(f"{self.name} finished.")
@@ -0,0 +1,157 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that works on spatial objects as binary WKB instead of WKT text."""
+from typing import Union
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import get_metadata
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ArrowArray = Union[pa.Array, pa.ChunkedArray]
+
+
+def _geometries(values: ArrowArray) -> np.ndarray:
+    """Parse a WKT string or WKB binary column into a numpy array of geometries."""
+    import shapely
+
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    raw = values.to_numpy(zero_copy_only=False)
+    if pa.types.is_binary(values.type) or pa.types.is_large_binary(values.type):
+        return shapely.from_wkb(raw)
+    return shapely.from_wkt(raw)
+
+
+def wkt_to_wkb(values: ArrowArray) -> "pa.BinaryArray":
+    """Convert a column of WKT strings to ISO WKB; nulls stay null."""
+    import shapely
+
+    return pa.array(shapely.to_wkb(_geometries(values), flavor="iso"), pa.binary())
+
+
+def wkb_to_wkt(values: ArrowArray, rounding_precision: int = -1) -> "pa.StringArray":
+    """
+    Convert a column of WKB values to WKT strings; nulls stay null.
+
+    The default ``rounding_precision`` of -1 writes coordinates at full precision.
+    """
+    import shapely
+
+    return pa.array(
+        shapely.to_wkt(_geometries(values), rounding_precision=rounding_precision),
+        pa.string(),
+    )
+
+
+def bounding_boxes(values: ArrowArray) -> "pa.Table":
+    """Return ``minx``, ``miny``, ``maxx`` and ``maxy`` columns for WKT or WKB."""
+    import shapely
+
+    bounds = shapely.bounds(_geometries(values))
+    return pa.table(
+        {
+            name: pa.array(bounds[:, i], from_pandas=True)
+            for i, name in enumerate(["minx", "miny", "maxx", "maxy"])
+        }
+    )
+
+
+def to_geoarrow(values: ArrowArray) -> "pa.Array":
+    """
+    Convert WKT or WKB values to a GeoArrow-style native array.
+
+    All values must have the same geometry type and no nulls. Points become
+    ``fixed_size_list<double>[2]`` (or 3 with Z); each ``Multi*``, polygon ring and
+    line string level adds a list level on top, following the GeoArrow layout.
+    """
+    import shapely
+
+    geometries = _geometries(values)
+    if shapely.is_missing(geometries).any():
+        raise ValueError("GeoArrow conversion requires a column without nulls.")
+    _, coords, offsets = shapely.to_ragged_array(geometries)
+    array: pa.Array = pa.FixedSizeListArray.from_arrays(
+        pa.array(coords.ravel(), pa.float64()), coords.shape[1]
+    )
+    # Offsets run from the innermost level (coordinates) to the outermost (geometries).
+    for level in offsets:
+        array = pa.ListArray.from_arrays(pa.array(level, pa.int32()), array)
+    return array
+
+
+class SpatialBoundsFilter(PluginV2):
+    """Keep records whose spatial object intersects a configured bounding box."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "SpatialBoundsFilter"
+        self.field = self.provider.tool_config.get("field") or ""
+        try:
+            self.box = [float(v) for v in self.provider.tool_config["box"].split(",")]
+        except (KeyError, ValueError):
+            raise WorkflowRuntimeError("Box must be 'minx,miny,maxx,maxy'.")
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Filter the batch with a vectorized bounding-box test.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        if get_metadata(batch, self.field)["type"] != FieldType.spatialobj:
+            raise WorkflowRuntimeError(f"{self.field} is not a spatial object field.")
+        bounds = bounding_boxes(batch[self.field])
+        minx, miny, maxx, maxy = self.box
+        overlaps_x = pc.and_(
+            pc.less_equal(bounds["minx"], maxx), pc.greater_equal(bounds["maxx"], minx)
+        )
+        overlaps_y = pc.and_(
+            pc.less_equal(bounds["miny"], maxy), pc.greater_equal(bounds["maxy"], miny)
+        )
+        keep = pc.fill_null(pc.and_(overlaps_x, overlaps_y), False)
+        self.provider.write_to_anchor("Output", batch.filter(keep))
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Clean up any plugin resources."""
+        self.provider.io.info(f"{self.name} finished.")
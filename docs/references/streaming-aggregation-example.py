@@ -0,0 +1,453 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example streaming summary tool built on mergeable aggregate states."""
+import math
+from typing import Dict, List, Optional, Tuple
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import create_schema
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import numpy as np
+
+import pandas as pd
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def _valid(values: "pa.ChunkedArray") -> "pa.ChunkedArray":
+    """Drop nulls and, from floating-point columns, NaN values."""
+    if pa.types.is_floating(values.type):
+        return pc.filter(values, pc.invert(pc.is_nan(values)))
+    return pc.filter(values, pc.is_valid(values))
+
+
+class CountState:
+    """Count of the non-null values seen so far."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        self.count += pc.count(values).as_py()
+
+    def merge(self, other: "CountState") -> None:
+        """Fold another partial state into this one."""
+        self.count += other.count
+
+    def finalize(self) -> int:
+        """Return the aggregate value."""
+        return self.count
+
+
+class SumState:
+    """Sum of the non-null, non-NaN values seen so far."""
+
+    def __init__(self) -> None:
+        self.total = 0
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        self.total += pc.sum(_valid(values)).as_py() or 0
+
+    def merge(self, other: "SumState") -> None:
+        """Fold another partial state into this one."""
+        self.total += other.total
+
+    def finalize(self) -> float:
+        """Return the aggregate value."""
+        return self.total
+
+
+class MinMaxState:
+    """Smallest and largest values seen so far."""
+
+    def __init__(self) -> None:
+        self.min = None
+        self.max = None
+
+    def _fold(self, low, high) -> None:  # type: ignore
+        if low is not None:
+            self.min = low if self.min is None else min(self.min, low)
+        if high is not None:
+            self.max = high if self.max is None else max(self.max, high)
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        min_max = pc.min_max(values)
+        self._fold(min_max["min"].as_py(), min_max["max"].as_py())
+
+    def merge(self, other: "MinMaxState") -> None:
+        """Fold another partial state into this one."""
+        self._fold(other.min, other.max)
+
+    def finalize(self) -> Tuple:
+        """Return the aggregate value."""
+        return self.min, self.max
+
+
+class MeanVarianceState:
+    """
+    Running count, mean and sum of squared deviations.
+
+    Partial states are combined with the pairwise update of Chan et al., so batches
+    and parallel workers can be merged in any order without losing precision.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _fold(self, count: int, mean: float, m2: float) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        values = _valid(values)
+        count = len(values)
+        if count == 0:
+            return
+        mean = pc.mean(values).as_py()
+        m2 = pc.variance(values, ddof=0).as_py() * count
+        self._fold(count, mean, m2)
+
+    def merge(self, other: "MeanVarianceState") -> None:
+        """Fold another partial state into this one."""
+        self._fold(other.count, other.mean, other.m2)
+
+    def finalize(self, ddof: int = 1) -> Tuple[Optional[float], Optional[float]]:
+        """Return the mean and the variance."""
+        if self.count == 0:
+            return None, None
+        if self.count <= ddof:
+            return self.mean, None
+        return self.mean, self.m2 / (self.count - ddof)
+
+
+def _hash64(values: "pa.ChunkedArray") -> np.ndarray:
+    """Hash the non-null, non-NaN values of a column to unsigned 64-bit integers."""
+    return pd.util.hash_array(_valid(values).to_pandas().to_numpy(), categorize=False)
+
+
+def _bit_length(words: np.ndarray) -> np.ndarray:
+    """Return the bit length of each unsigned 64-bit word."""
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class DistinctCountState:
+    """
+    Approximate distinct count using HyperLogLog.
+
+    The state is ``2 ** precision`` one-byte registers; the default precision of 12
+    uses 4 KB and has a standard error of about 1.6%.
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        hashes = _hash64(values)
+        if hashes.size == 0:
+            return
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        rank = (value_bits - _bit_length(remainder) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "DistinctCountState") -> None:
+        """Fold another partial state into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge states with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def finalize(self) -> int:
+        """Return the estimated number of distinct values."""
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class QuantileState:
+    """
+    Approximate quantiles using a merging t-digest.
+
+    Values are buffered and periodically compressed into at most about
+    ``compression`` weighted centroids, so memory does not grow with the input.
+    """
+
+    def __init__(self, compression: int = 100, buffer_size: int = 10000) -> None:
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        if weights.size == 0:
+            # Merging states that saw no values.
+            return
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        # The k1 scale function keeps centroids small near the tails.
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k - k[0]).astype(np.intp)
+        self.weights = np.bincount(bucket, weights=weights)
+        self.means = np.bincount(bucket, weights=means * weights)
+        used = self.weights > 0
+        self.weights = self.weights[used]
+        self.means = self.means[used] / self.weights
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(values.size)]),
+        )
+
+    def update(self, values: "pa.ChunkedArray") -> None:
+        """Add the values of one batch column to the state."""
+        values = pc.cast(_valid(values), pa.float64()).to_numpy()
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def merge(self, other: "QuantileState") -> None:
+        """Fold another partial state into this one."""
+        self._flush()
+        other._flush()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def finalize(self, quantiles: List[float]) -> List[Optional[float]]:
+        """Return the estimated value at each of the requested quantiles."""
+        self._flush()
+        if self.weights.size == 0:
+            return [None] * len(quantiles)
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.asarray(quantiles) * self.weights.sum()
+        estimates = np.interp(ranks, centers, self.means, self.min, self.max)
+        return [float(value) for value in estimates]
+
+
+_MERGE_FUNCTIONS = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+class GroupByState:
+    """
+    Hash aggregation keyed by one or more columns.
+
+    Each batch is reduced with ``pa.Table.group_by`` and folded into a partial table
+    that holds one row per group, so memory grows with the number of groups rather
+    than the number of records. Supported functions are ``count``, ``sum``, ``min``,
+    ``max`` and ``mean``.
+    """
+
+    def __init__(self, keys: List[str], aggregations: List[Tuple[str, str]]) -> None:
+        for column, function in aggregations:
+            if function != "mean" and function not in _MERGE_FUNCTIONS:
+                raise ValueError(f"Unsupported aggregation {function} on {column}")
+        self.keys = keys
+        self.aggregations = aggregations
+        partials = set()
+        for column, function in aggregations:
+            if function == "mean":
+                partials.update([(column, "sum"), (column, "count")])
+            else:
+                partials.add((column, function))
+        self._partials = sorted(partials)
+        self._state: Optional[pa.Table] = None
+
+    def _combine(self, tables: List["pa.Table"]) -> None:
+        if self._state is not None:
+            tables = [self._state] + tables
+        combined = pa.concat_tables(tables)
+        names = [f"{column}_{function}" for column, function in self._partials]
+        merged = combined.group_by(self.keys).aggregate(
+            [
+                (name, _MERGE_FUNCTIONS[function])
+                for name, (_, function) in zip(names, self._partials)
+            ]
+        )
+        self._state = pa.table(
+            [merged[key] for key in self.keys]
+            + [
+                merged[f"{name}_{_MERGE_FUNCTIONS[function]}"]
+                for name, (_, function) in zip(names, self._partials)
+            ],
+            names=self.keys + names,
+        )
+
+    def update(self, batch: "pa.Table") -> None:
+        """Reduce one record batch and fold it into the state."""
+        partial = batch.group_by(self.keys).aggregate(self._partials)
+        self._combine(
+            [partial.select(self.keys + [f"{c}_{f}" for c, f in self._partials])]
+        )
+
+    def merge(self, other: "GroupByState") -> None:
+        """Fold the partial table from another worker into this one."""
+        if other._state is not None:
+            self._combine([other._state])
+
+    def finalize(self) -> "pa.Table":
+        """Return a row per group, with a column per aggregation."""
+        if self._state is None:
+            return pa.table({})
+        columns: Dict[str, "pa.ChunkedArray"] = {
+            key: self._state[key] for key in self.keys
+        }
+        for column, function in self.aggregations:
+            if function == "mean":
+                columns[f"{column}_mean"] = pc.divide(
+                    pc.cast(self._state[f"{column}_sum"], pa.float64()),
+                    self._state[f"{column}_count"],
+                )
+            else:
+                columns[f"{column}_{function}"] = self._state[f"{column}_{function}"]
+        return pa.table(columns)
+
+
+class StreamingSummary(PluginV2):
+    """Summarize every numeric input column without holding the input in memory."""
+
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "StreamingSummary"
+        self.states: Dict[str, Dict[str, object]] = {}
+        self.output_schema = create_schema(
+            {
+                "category": {"type": FieldType.v_wstring},
+                "count": {"type": FieldType.int64},
+                "mean": {"type": FieldType.double},
+                "stddev": {"type": FieldType.double},
+                "min": {"type": FieldType.double},
+                "max": {"type": FieldType.double},
+                "approx_distinct": {"type": FieldType.int64},
+                "median": {"type": FieldType.double},
+                "p95": {"type": FieldType.double},
+            }
+        )
+        self.provider.push_outgoing_metadata("Output", self.output_schema)
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """
+        Fold the passed record batch into the per-column aggregate states.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        batch
+            A pyarrow Table that contains the received batch.
+        anchor
+            A namedtuple('Anchor', ['name', 'connection']) that contains input connection identifiers.
+        """
+        for name, column in zip(batch.column_names, batch.columns):
+            if pa.types.is_duration(column.type):
+                column = pc.cast(column, pa.int64())
+            if not (
+                pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+            ):
+                continue
+            states = self.states.setdefault(
+                name,
+                {
+                    "minmax": MinMaxState(),
+                    "moments": MeanVarianceState(),
+                    "distinct": DistinctCountState(),
+                    "quantiles": QuantileState(),
+                },
+            )
+            for state in states.values():
+                state.update(column)  # type: ignore
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """
+        Call when an incoming connection is done sending data including when no data is sent on an optional input anchor.
+
+        This method is not called during update-only mode.
+
+        Parameters
+        ----------
+        anchor
+            NamedTuple containing anchor.name and anchor.connection.
+        """
+        self.provider.io.info(
+            f"Received complete update from {anchor.name}:{anchor.connection}."
+        )
+
+    def on_complete(self) -> None:
+        """Finalize the aggregate states and write one summary row per column."""
+        rows = []
+        for name, states in self.states.items():
+            low, high = states["minmax"].finalize()  # type: ignore
+            mean, variance = states["moments"].finalize()  # type: ignore
+            median, p95 = states["quantiles"].finalize([0.5, 0.95])  # type: ignore
+            rows.append(
+                {
+                    "category": name,
+                    "count": states["moments"].count,  # type: ignore
+                    "mean": mean,
+                    "stddev": None if variance is None else math.sqrt(variance),
+                    "min": low,
+                    "max": high,
+                    "approx_distinct": states["distinct"].finalize(),  # type: ignore
+                    "median": median,
+                    "p95": p95,
+                }
+            )
+        self.provider.write_to_anchor(
+            "Output", pa.Table.from_pylist(rows, schema=self.output_schema)
+        )
+        self.provider.io.info(f"{self.name} finished.")
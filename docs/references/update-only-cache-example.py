@@ -0,0 +1,235 @@
+# Copyright (C) 2023 Alteryx, Inc. All rights reserved.
+#
+# Licensed under the ALTERYX SDK AND API LICENSE AGREEMENT;
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.alteryx.com/alteryx-sdk-and-api-license-agreement
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Example tool that answers update-only runs from cached outgoing metadata."""
+import base64
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ayx_python_sdk.core import Anchor, PluginV2
+from ayx_python_sdk.core.exceptions import WorkflowRuntimeError
+from ayx_python_sdk.core.field import FieldType
+from ayx_python_sdk.core.utils import create_schema
+from ayx_python_sdk.providers.amp_provider.amp_provider_v2 import AMPProviderV2
+
+import pyarrow as pa
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "ayx_plugin_metadata_cache"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, pa.Schema):
+        return value.serialize().to_pybytes().hex()
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            json.dumps(item, sort_keys=True, default=_json_default) for item in value
+        )
+    # A str() fallback could include object addresses, which change on every run.
+    raise TypeError(f"{type(value).__name__} values can't be part of a cache key.")
+
+
+def is_update_only(provider: AMPProviderV2) -> bool:
+    """Return whether Designer is running the tool in update-only mode."""
+    update_only = getattr(provider.environment, "update_only", None)
+    if update_only is None:
+        update_only = provider.environment.raw_constants.get("UpdateOnly", False)
+    return str(update_only).strip().lower() in ("true", "1")
+
+
+class OutgoingMetadataCache:
+    """
+    On-disk cache of the schemas a plugin pushes with ``push_outgoing_metadata``.
+
+    Entries are keyed by the plugin name, the plugin version, the tool configuration
+    and the incoming metadata, so any change to these produces a new entry. Bump the
+    version whenever the code that builds the schemas changes.
+
+    Parameters
+    ----------
+    plugin_name
+        Name of the plugin class.
+    version
+        Version of the plugin.
+    cache_dir
+        Directory for the cache files.
+    max_entries
+        Number of entries to keep; the least recently written are removed first.
+    """
+
+    def __init__(
+        self,
+        plugin_name: str,
+        version: str,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_entries: int = 1000,
+    ) -> None:
+        self.plugin_name = plugin_name
+        self.version = version
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def key(self, provider: AMPProviderV2) -> str:
+        """Return the cache key of the configuration and the incoming metadata."""
+        document = json.dumps(
+            {
+                "plugin": self.plugin_name,
+                "version": self.version,
+                "config": provider.tool_config,
+                "incoming": provider.incoming_anchors,
+            },
+            sort_keys=True,
+            default=_json_default,
+        )
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, "pa.Schema"]]:
+        """Return the cached schemas by outgoing anchor name, or None on a miss."""
+        try:
+            entry = json.loads((self.cache_dir / f"{key}.json").read_text("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return {
+            anchor: pa.ipc.read_schema(pa.py_buffer(base64.b64decode(data)))
+            for anchor, data in entry.items()
+        }
+
+    def store(self, key: str, schemas: Dict[str, "pa.Schema"]) -> None:
+        """Save the schemas pushed for ``key``."""
+        entry = {
+            anchor: base64.b64encode(schema.serialize().to_pybytes()).decode("ascii")
+            for anchor, schema in schemas.items()
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+            temp_path.write_text(json.dumps(entry), "utf-8")
+            os.replace(temp_path, self.cache_dir / f"{key}.json")
+            self._prune()
+        except OSError:
+            # A read-only or full disk must not fail the tool.
+            pass
+
+    def _prune(self) -> None:
+        entries = sorted(
+            self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime
+        )
+        for path in entries[: max(0, len(entries) - self.max_entries)]:
+            path.unlink()
+
+
+def cache_outgoing_metadata(version: str, **cache_options: Any) -> Callable:
+    """
+    Decorate a plugin's ``__init__`` to answer update-only runs from a metadata cache.
+
+    During a workflow run, ``__init__`` runs as usual and the schemas it pushes with
+    ``provider.push_outgoing_metadata`` are cached. During an update-only run with a
+    cache hit, the cached schemas are pushed and the body of ``__init__`` is skipped;
+    only ``self.provider`` is set.
+
+    Parameters
+    ----------
+    version
+        Version of the plugin; bump it whenever the outgoing schemas change.
+    cache_options
+        Keyword arguments for ``OutgoingMetadataCache``.
+    """
+
+    def decorator(init: Callable) -> Callable:
+        @functools.wraps(init)
+        def wrapper(self: PluginV2, provider: AMPProviderV2) -> None:
+            cache = OutgoingMetadataCache(type(self).__name__, version, **cache_options)
+            try:
+                key = cache.key(provider)
+            except TypeError:
+                # The configuration can't be keyed reliably, so don't cache it.
+                init(self, provider)
+                return
+            if is_update_only(provider):
+                schemas = cache.load(key)
+                if schemas is not None:
+                    self.provider = provider
+                    for anchor_name, schema in schemas.items():
+                        provider.push_outgoing_metadata(anchor_name, schema)
+                    return
+
+            pushed: Dict[str, "pa.Schema"] = {}
+            push_outgoing_metadata = provider.push_outgoing_metadata
+
+            def record(anchor_name: str, schema: "pa.Schema") -> None:
+                pushed[anchor_name] = schema
+                push_outgoing_metadata(anchor_name, schema)
+
+            provider.push_outgoing_metadata = record  # type: ignore
+            try:
+                init(self, provider)
+            finally:
+                del provider.push_outgoing_metadata
+            if pushed:
+                cache.store(key, pushed)
+
+        return wrapper
+
+    return decorator
+
+
+class CachedMetadataInput(PluginV2):
+    """Input tool with an expensive constructor that keeps update-only runs fast."""
+
+    @cache_outgoing_metadata(version="1.0")
+    def __init__(self, provider: AMPProviderV2) -> None:
+        """Construct a plugin."""
+        self.provider = provider
+        self.name = "CachedMetadataInput"
+        self.datasets_dir = Path(self.provider.tool_config.get("datasetsDir") or ".")
+        if not self.datasets_dir.is_dir():
+            raise WorkflowRuntimeError(f"Bad path: {self.datasets_dir}")
+        self.files = sorted(self.datasets_dir.glob("*.csv"))
+        self.provider.push_outgoing_metadata(
+            "Output",
+            create_schema(
+                {
+                    "file_name": {"type": FieldType.v_wstring},
+                    "size": {"type": FieldType.int64},
+                }
+            ),
+        )
+        self.provider.io.info(f"{self.name} initialized.")
+
+    def on_incoming_connection_complete(self, anchor: Anchor) -> None:
+        """Input tools don't have incoming connections."""
+        raise NotImplementedError("Input tools don't receive incoming connections.")
+
+    def on_record_batch(self, batch: "pa.Table", anchor: Anchor) -> None:
+        """Input tools don't receive batches."""
+        raise NotImplementedError("Input tools don't receive batches.")
+
+    def on_complete(self) -> None:
+        """List the CSV files in the datasets directory."""
+        sizes = [path.stat().st_size for path in self.files]
+        self.provider.write_to_anchor(
+            "Output",
+            pa.table(
+                {
+                    "file_name": [path.name for path in self.files],
+                    "size": pa.array(sizes, pa.int64()),
+                }
+            ),
+        )
+        self.provider.io.info(f"{self.name} finished.")